@@ -1,24 +1,26 @@
 import psycopg2
 import csv
+import time
 from config import load_config
+from phonebook_shards import ShardRouter
 from tabulate import tabulate # You may not have this library, pleas download this if it is not avalable
 
+router = None  # PhoneBook shard router, created on first use
+
+def get_router():
+    """ Shard router for the [shard...] sections of database.ini ([postgresql] if there are none). """
+    global router
+    if router is None: router = ShardRouter()
+    return router
+
 def insert_from_console():
     """ Insert a single user from console input. """
     name   = input("Enter name: ")
     number = input("Enter phone number: ")
 
     try:
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                        "INSERT INTO PhoneBook (name, number) VALUES (%s, %s)",
-                        (name, number)
-                        )
-
-                conn.commit()
-                print("\nData inserted successfully.\n")
+        get_router().insert(name, number)
+        print("\nData inserted successfully.\n")
 
     except Exception as error:
         print("Error inserting from console:", error)
@@ -26,21 +28,13 @@ def insert_from_console():
 def insert_from_csv(file_path):
     """ Insert multiple users from a CSV file. """
     try:
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
-                with open(file_path, newline='', encoding='utf-8') as f:
-                    reader = csv.reader(f)
-                    for row in reader:
-                        if len(row) == 2:
-                            name, number = row
-                            cur.execute(
-                                    "INSERT INTO PhoneBook (name, number) VALUES (%s, %s)",
-                                    (name, number)
-                                    )
-                    conn.commit()
-                    print("\nCSV data uploaded successfully.\n")
+        with open(file_path, newline='', encoding='utf-8') as f:
+            rows = [row for row in csv.reader(f) if len(row) == 2]
 
+        # Grouped by shard, one batched insert per shard, all shards in parallel
+        for shard, count in get_router().insert_many(rows).items():
+            print(f"{shard}: {count} rows")
+        print("\nCSV data uploaded successfully.\n")
 
     except Exception as error:
         print("Error inserting from CSV:", error)
@@ -48,6 +42,8 @@ def insert_from_csv(file_path):
 
 def update_date():
     """ Update a user's name or phone number based on ID or name. """
+    global phonebook_index
+    phonebook_index = None  # Index only follows inserts, reload it on next search
 
     print("\nWhat do you want to update?\n1 - Update name\n2 - Update phone number\n")
     choice = input("Enter choice [1/2]: ")
@@ -55,81 +51,96 @@ def update_date():
     identifier = input("Enter the name of the user to update: ")
 
     try:
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
+        if choice == '1':
+            new_name = input("Enter the new name: ")
+            get_router().rename(identifier, new_name)
+            print("Name updated successfully.")
 
-                if choice == '1':
-                    new_name = input("Enter the new name: ")
-                    cur.execute(
-                        "UPDATE PhoneBook SET name = %s WHERE name = %s", 
-                        (new_name, identifier)
-                    )
+        elif choice == '2':
+            new_number = input("Enter the new number: ")
+            get_router().change_number(identifier, new_number)  # Moves rows to the new number's shard
+            print("\nPhone number updated successfully.\n")
 
-                    print("Name updated successfully.")
+        else:
+            print("Invalid choice.")
+            return
 
-                elif choice == '2':
-                    new_number = input("Enter the new number: ")
-                    cur.execute(
-                        "UPDATE PhoneBook SET number = %s WHERE name = %s",
-                        (new_number, identifier)
-                    )
+    except Exception as error:
+        print("\nError updating entry:\n", error)
 
-                    print("\nPhone number updated successfully.\n")
+phonebook_index = None  # Local prefix index, loaded on first use
 
-                else:
-                    print("Invalid choice.")
-                    return
+def search_as_you_type():
+    """ Prefix search on a local in-memory index, no server round trip per lookup. """
+    global phonebook_index
+    from phonebook_index import PhoneBookIndex
 
-                conn.commit()
+    try:
+        if phonebook_index is None:
+            phonebook_index = PhoneBookIndex(get_router())  # Every shard
+            print(f"\nLoaded {phonebook_index.reload()} records into local index.")
+        else:
+            print(f"\n{phonebook_index.refresh()} new records since last search.")
     except Exception as error:
-        print("\nError updating entry:\n", error)
+        print("\nError loading index:\n", error)
+        return
+
+    while True:
+        prefix = input("\nStart of name or number (empty to stop): ")
+        if not prefix: return
+
+        started = time.perf_counter()
+        rows = phonebook_index.find_number(prefix) or phonebook_index.search(prefix)  # Full number: exact lookup
+        elapsed = (time.perf_counter() - started) * 1e6
+
+        if rows: print("\n" + tabulate(rows, headers=["Shard", "ID", "Name", "Phone number"], tablefmt="fancy_grid"))
+        else:    print("\nNo records found.")
+        print(f"({elapsed:.0f} us)")
 
 def query_data():
     """ Query data with different filters, displayed nicely. """
 
-    print ("\nChoose a filter:\n1 - Show all\n2 - Filter by name\n3 - Filter by phone\n4 - Search by partial match")
-    choice = input("\nEnter choice [1/2/3/4]: ")
+    print ("\nChoose a filter:\n1 - Show all\n2 - Filter by name\n3 - Filter by phone\n4 - Search by partial match\n5 - Search as you type (local index)")
+    choice = input("\nEnter choice [1/2/3/4/5]: ")
+
+    if choice == '5':
+        search_as_you_type()
+        return
 
     try:
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
+        shards = get_router()
 
-                if choice == '1':
-                    cur.execute("SELECT * FROM PhoneBook")
-                    rows = cur.fetchall()
+        if choice == '1':
+            rows = shards.show_all()
 
-                elif choice == '2':
-                    name = input("Enter name to search: ")
-                    cur.execute("SELECT * FROM PhoneBook WHERE name = %s", (name,))
-                    rows = cur.fetchall()
+        elif choice == '2':
+            name = input("Enter name to search: ")
+            rows = shards.find_name(name)
 
-                elif choice == '3':
-                    number = input("Enter number to search: ")
-                    cur.execute("SELECT * FROM PhoneBook WHERE number = %s", (number,))
-                    rows = cur.fetchall()
+        elif choice == '3':
+            number = input("Enter number to search: ")
+            rows = shards.find_number(number)  # Only the shard that owns the number
 
-                elif choice == '4':
-                    pattern = input("Enter partial name or number (e.g., 'Ali' or '87%'): ")
-                    cur.execute("SELECT * FROM PhoneBook WHERE name ILIKE %s OR number ILIKE %s", 
-                                (f"%{pattern}%", f"%{pattern}%"))
-                    rows = cur.fetchall()
+        elif choice == '4':
+            pattern = input("Enter partial name or number (e.g., 'Ali' or '87%'): ")
+            rows = shards.search(pattern)
 
-                else:
-                    print("Invalid choice.")
-                    return
+        else:
+            print("Invalid choice.")
+            return
 
-                if rows:
-                    print("\n" + tabulate(rows, headers=["ID", "Name", "Phone number"], tablefmt="fancy_grid"))
-                else:
-                    print("\nNo records found.\n")
+        if rows:
+            print("\n" + tabulate(rows, headers=["Shard", "ID", "Name", "Phone number"], tablefmt="fancy_grid"))
+        else:
+            print("\nNo records found.\n")
 
     except Exception as error:
         print("\nError querying data:\n", error)
 
 def run_custom_sql():
     """ Allow user to write and run custom SQL commands. """
+    global phonebook_index
+    phonebook_index = None  # May change any row, reload index on next search
 
     print("\nEnter your SQL query below")
     query = input("SQL> ")
@@ -156,29 +167,23 @@ def run_custom_sql():
 
 def delete_entry():
     """ Delete an entry from the PhoneBook by name or number. """
+    global phonebook_index
+    phonebook_index = None  # Index only follows inserts, reload it on next search
     print("\nChoose deletion filter:\n1 - Delete by name\n2 - Delete by number")
     choice = input("Enter choice [1/2]: ")
 
     try:
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
-
-                if choice == '1':
-                    name = input("Enter the name to delete: ")
-                    cur.execute("DELETE FROM PhoneBook WHERE name = %s", (name,))
-                    print(f"\nDeleted {cur.rowcount} record with name '{name}'.\n")
+        if choice == '1':
+            name = input("Enter the name to delete: ")
+            print(f"\nDeleted {get_router().delete_name(name)} record with name '{name}'.\n")
 
-                elif choice == '2':
-                    number = input("Enter the number to delete: ")
-                    cur.execute("DELETE FROM PhoneBook WHERE number = %s", (number,))
-                    print(f"\nDeleted {cur.rowcount} record with number '{number}'.\n")
+        elif choice == '2':
+            number = input("Enter the number to delete: ")
+            print(f"\nDeleted {get_router().delete_number(number)} record with number '{number}'.\n")
 
-                else:
-                    print("Invalid choic.")
-                    return
-
-                conn.commit()
+        else:
+            print("Invalid choic.")
+            return
 
     except Exception as error:
         print("Error deleting entry:", error)
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+from collections import deque, OrderedDict
+import pygame as pg
+from main_snake import Simulation, GameState, GRID_CELL, LEVEL_COUNT, Player
+
+# Autopilot: plays snake through the same key input path as a human (Game.handle_key_press).
+# Routing uses BFS distance fields over the level's cell bitmap, cached per food cell, so a
+# tick only costs a few dictionary lookups and rect checks; BFS runs once per food spawn.
+KEYS = {(1, 0): pg.K_RIGHT, (-1, 0): pg.K_LEFT, (0, 1): pg.K_DOWN, (0, -1): pg.K_UP}
+UNREACHABLE = 1 << 30
+TAIL_CHECK_LENGTH = 30  # Check the tail stays reachable once the snake is this long
+
+
+class Autopilot:
+    def __init__(self, cache_size=256):
+        self.fields     = OrderedDict()  # (level, food cell) -> distance field, LRU
+        self.cache_size = cache_size
+        self.decisions  = 0              # Decisions made
+        self.decide_time = 0.0           # Seconds spent deciding
+
+    def distance_field(self, level, target):
+        """BFS distance of every free cell to target cell, cached per level and target"""
+        key = (level.level_num, target)
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+            return field
+
+        width, height = level.grid_size
+        blocked = level.bitmap
+        field = [UNREACHABLE] * (width * height)
+        field[target] = 0
+        queue = deque([target])
+        while queue:
+            cell = queue.popleft()
+            distance = field[cell] + 1
+            x = cell % width
+            for neighbour in (cell - 1 if x > 0 else -1, cell + 1 if x < width - 1 else -1,
+                              cell - width, cell + width):
+                if 0 <= neighbour < len(field) and not blocked[neighbour] and field[neighbour] == UNREACHABLE:
+                    field[neighbour] = distance
+                    queue.append(neighbour)
+
+        self.fields[key] = field
+        if len(self.fields) > self.cache_size: self.fields.popitem(last=False)
+        return field
+
+    @staticmethod
+    def cell_of(rect, width):
+        """Grid cell containing the center of a rect"""
+        return (rect.centery // GRID_CELL) * width + rect.centerx // GRID_CELL
+
+    @staticmethod
+    def survives(level, body, head, dx, dy):
+        """Pixel-exact game rules: swept wall collision or landing on own body"""
+        new_head = head.move(dx, dy)
+        if level.check_collision(new_head.union(head)) or new_head in body[1:]: return None
+        return new_head
+
+    def tail_reachable(self, level, body, start):
+        """Flood fill from start over cells not covered by the body, looking for the tail"""
+        width = level.grid_size[0]
+        blocked = level.bitmap
+        occupied = {self.cell_of(segment, width) for segment in body[:-1]}
+        tail = self.cell_of(body[-1], width)
+        seen, queue = {start}, deque([start])
+        while queue:
+            cell = queue.popleft()
+            if cell == tail: return True
+            for neighbour in (cell - 1, cell + 1, cell - width, cell + width):
+                if neighbour not in seen and 0 <= neighbour < len(blocked) and not blocked[neighbour] \
+                        and (neighbour not in occupied or neighbour == tail):
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return False
+
+    def choose_direction(self, sim):
+        """Unit direction for the next tick, None to keep going"""
+        started = time.perf_counter()
+        snake, level = sim.snake, sim.level
+        width = level.grid_size[0]
+        head, body, step = snake.body[0], snake.body, snake.step
+        current = (int(snake.direction[0] > 0) - int(snake.direction[0] < 0),
+                   int(snake.direction[1] > 0) - int(snake.direction[1] < 0))
+
+        # Chase special food while it's active and at least as close
+        field = self.distance_field(level, self.cell_of(sim.food.rect, width))
+        if sim.special_food.active:
+            special = self.distance_field(level, self.cell_of(sim.special_food.rect, width))
+            if special[self.cell_of(head, width)] <= field[self.cell_of(head, width)]: field = special
+
+        best, best_cost = None, None
+        for direction in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            if direction == (-current[0], -current[1]): continue  # No 180 degree turns
+            dx, dy = direction[0] * step, direction[1] * step
+            new_head = self.survives(level, body, head, dx, dy)
+            if new_head is None: continue
+
+            # Look one more tick ahead so we don't drive into a dead end
+            if not any(self.survives(level, body, new_head, ndx * step, ndy * step)
+                       for ndx, ndy in ((1, 0), (-1, 0), (0, 1), (0, -1)) if (ndx, ndy) != (-direction[0], -direction[1])):
+                continue
+
+            cell = self.cell_of(new_head, width)
+            cost = field[cell] * 2 + (direction != current)  # Prefer going straight on ties
+            if len(body) >= TAIL_CHECK_LENGTH and not self.tail_reachable(level, body, cell):
+                cost += UNREACHABLE  # Only if nothing better
+            if best_cost is None or cost < best_cost:
+                best, best_cost = direction, cost
+
+        self.decisions += 1
+        self.decide_time += time.perf_counter() - started
+        return None if best in (None, current) else best
+
+    def choose_key(self, sim):
+        """Arrow key to press this tick, None for no key"""
+        direction = self.choose_direction(sim)
+        return KEYS[direction] if direction else None
+
+
+def run_headless(games=100, level_num=1, autopilot=None):
+    """Play games on the headless Simulation as fast as possible"""
+    autopilot = autopilot or Autopilot()
+    wins, ticks, score = 0, 0, 0
+    started = time.perf_counter()
+    for game in range(games):
+        sim = Simulation(level_num, 0, seed=game)
+        state = GameState.Playing
+        while state == GameState.Playing and sim.ticks < 20000:
+            state = sim.step(autopilot.choose_direction(sim))
+        wins  += state == GameState.Win
+        ticks += sim.ticks
+        score += sim.snake.score
+    elapsed = time.perf_counter() - started
+    print(f"level {level_num}: {wins}/{games} won, avg score {score / games:.2f}, "
+          f"{ticks / elapsed:.0f} ticks/s, {autopilot.decide_time / max(autopilot.decisions, 1) * 1e6:.1f} us/decision")
+
+
+def soak(rounds=20, name="autopilot"):
+    """Drive the real Game (renderer, login and save paths) with the autopilot at full speed"""
+    from main_snake import Game
+    game = Game()
+    game.autopilot = Autopilot()
+    game.text_input.text = name
+    game.handle_login()
+    while game.state == GameState.Connecting:  # Login runs on database thread
+        game.poll_db()
+        time.sleep(0.01)
+    if not game.player:  # No database: play anyway, saves will just fail
+        game.player = Player(name)
+        game.state = GameState.Menu
+    game.start_game()
+
+    finished, frames = 0, 0
+    started = time.perf_counter()
+    while finished < rounds:
+        pg.event.pump()
+        game.update()
+        game.draw()
+        frames += 1
+        if game.state == GameState.Win:
+            finished += 1
+            if game.player.level < LEVEL_COUNT: game.next_level()  # Saves progress
+            else: game.reset_game()
+        elif game.state == GameState.Lose:
+            finished += 1
+            game.reset_game()
+    elapsed = time.perf_counter() - started
+    print(f"{rounds} rounds, {frames} frames in {elapsed:.1f} s ({frames / elapsed:.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    # Usage: python autopilot.py [games] [level]   headless simulation
+    #        python autopilot.py --soak [rounds]   real Game, renderer and database
+    if "--soak" in sys.argv:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        args = [arg for arg in sys.argv[1:] if arg.isdigit()]
+        soak(int(args[0]) if args else 20)
+    else:
+        args = [int(arg) for arg in sys.argv[1:3]]
+        games, level_num = args + [100, 1][len(args):]
+        run_headless(games, level_num)
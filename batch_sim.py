@@ -0,0 +1,199 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from main_snake import Level, GRID_CELL, SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Batch environment plays many snake games at once on a cell grid, for comparing level layouts
+# (walls, open space, how often a policy gets stuck). It is a simplified model: one cell is one
+# snake segment (20px), the snake moves one cell per tick at constant speed and there is only
+# regular one-cell food. Speed growth, step size and special food are not modelled, so tune those
+# with main_snake.Simulation (exact game rules, e.g. autopilot.run_headless) instead.
+# A game that goes starve_ticks without eating ends as a timeout (stuck behind a wall, circling).
+CELL = GRID_CELL
+GRID_W = SCREEN_WIDTH // CELL
+GRID_H = SCREEN_HEIGHT // CELL
+
+# Directions: right, down, left, up (opposite = (d + 2) % 4)
+DIR_DX = np.array([1, 0, -1, 0])
+DIR_DY = np.array([0, 1, 0, -1])
+DIR_STEP = DIR_DX + DIR_DY * GRID_W  # Step in flat cell index
+
+
+def wall_mask(level_num):
+    """Blocked cells of a level: walls and screen border, from the compiled level bitmap"""
+    return np.frombuffer(Level(level_num).bitmap, dtype=np.uint8).astype(bool)
+
+
+class BatchEnv:
+    def __init__(self, n_games, level_num=1, win_score=None, seed=None, starve_ticks=None):
+        self.n         = n_games                          # Number of parallel games
+        self.level_num = level_num                        # Level layout
+        self.win_score = level_num * 5 if win_score is None else win_score  # Score that ends a game as won (0 = never)
+        self.rng       = np.random.default_rng(seed)      # Random source for food
+        self.blocked   = wall_mask(level_num)             # Blocked cells (flat)
+        self.spawn     = np.flatnonzero(~self.blocked)    # Cells food may appear on
+        self.size      = GRID_W * GRID_H                  # Cells per board
+        self.starve_ticks = self.size // 4 if starve_ticks is None else starve_ticks  # Ticks without food before timeout (0 = never)
+        self.games     = np.arange(n_games)               # Row index of every game
+
+        # Per game state
+        self.occupied = np.zeros((n_games, self.size), dtype=np.uint8)   # Snake segments per cell
+        self.body     = np.zeros((n_games, self.size), dtype=np.int32)   # Ring buffer of body cells
+        self.head_ptr = np.zeros(n_games, dtype=np.int64)                # Ring index of head
+        self.length   = np.zeros(n_games, dtype=np.int64)                # Snake length
+        self.heads    = np.zeros(n_games, dtype=np.int64)                # Head cell
+        self.dirs     = np.zeros(n_games, dtype=np.int64)                # Current direction
+        self.food     = np.zeros(n_games, dtype=np.int64)                # Food cell
+        self.score    = np.zeros(n_games, dtype=np.int64)                # Current score
+        self.ticks    = np.zeros(n_games, dtype=np.int64)                # Ticks in current game
+        self.hunger   = np.zeros(n_games, dtype=np.int64)                # Ticks since last food
+
+        # Totals of finished games
+        self.games_done  = 0
+        self.wins        = 0
+        self.timeouts    = 0
+        self.total_score = 0
+        self.total_ticks = 0
+
+        self.reset(np.ones(n_games, dtype=bool))
+
+    def reset(self, mask):
+        """Start new games where mask is set: snake of 2 in the middle heading right"""
+        games = self.games[mask]
+        if not len(games): return
+
+        center = (GRID_H // 2) * GRID_W + GRID_W // 2
+        self.occupied[games] = 0
+        self.body[games, 0] = center - 1  # Tail
+        self.body[games, 1] = center      # Head
+        self.occupied[games, center - 1] = 1
+        self.occupied[games, center] = 1
+        self.head_ptr[games] = 1
+        self.length[games]   = 2
+        self.heads[games]    = center
+        self.dirs[games]     = 0
+        self.score[games]    = 0
+        self.ticks[games]    = 0
+        self.hunger[games]   = 0
+        self.place_food(games)
+
+    def place_food(self, games):
+        """Put food on a random free spawn cell, all given games at once"""
+        for _ in range(32):  # Rejection sampling, nearly always done in 1-2 rounds
+            if not len(games): return
+            cells = self.spawn[self.rng.integers(0, len(self.spawn), len(games))]
+            free  = self.occupied[games, cells] == 0
+            self.food[games[free]] = cells[free]
+            games = games[~free]
+
+        for game in games:  # Very full boards: pick from free cells directly
+            free = self.spawn[self.occupied[game, self.spawn] == 0]
+            self.food[game] = self.rng.choice(free) if len(free) else self.heads[game]
+
+    def step(self, actions=None):
+        """Advance every game one tick; actions are directions (0-3) or -1 to keep going"""
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = (actions >= 0) & (actions != (self.dirs + 2) % 4)  # No 180 degree turns
+            self.dirs = np.where(turn, actions, self.dirs)
+
+        games    = self.games
+        new_head = self.heads + DIR_STEP[self.dirs]
+        tail_ptr = (self.head_ptr - self.length + 1) % self.size
+        tail     = self.body[games, tail_ptr]
+        eats     = new_head == self.food
+
+        # Hitting the tail is fine when it moves away this tick
+        hits_body = (self.occupied[games, new_head] > 0) & ~((new_head == tail) & ~eats)
+        dead = self.blocked[new_head] | hits_body
+        alive = ~dead
+
+        # Move: drop tail (unless growing), add head
+        moving = alive & ~eats
+        self.occupied[games[moving], tail[moving]] -= 1
+        self.head_ptr = np.where(alive, (self.head_ptr + 1) % self.size, self.head_ptr)
+        self.body[games[alive], self.head_ptr[alive]] = new_head[alive]
+        self.occupied[games[alive], new_head[alive]] += 1
+        self.heads  = np.where(alive, new_head, self.heads)
+        self.ticks += 1
+
+        growing = alive & eats
+        self.length += growing
+        self.score  += growing
+        self.hunger  = np.where(growing, 0, self.hunger + 1)
+        self.place_food(games[growing])
+
+        won  = (self.score >= self.win_score) if self.win_score else np.zeros(self.n, dtype=bool)
+        starved = (self.hunger >= self.starve_ticks) & alive & ~won if self.starve_ticks else np.zeros(self.n, dtype=bool)
+        done = dead | won | starved
+        if done.any():
+            self.games_done  += int(done.sum())
+            self.wins        += int(won.sum())
+            self.timeouts    += int(starved.sum())
+            self.total_score += int(self.score[done].sum())
+            self.total_ticks += int(self.ticks[done].sum())
+            self.reset(done)
+        return done
+
+    def greedy_actions(self, noise=0.1):
+        """Direction towards food avoiding immediate death, for every game at once"""
+        candidates = self.heads[:, None] + DIR_STEP[None, :]                    # (n, 4) next cells
+        safe = ~self.blocked[candidates] & (self.occupied[self.games[:, None], candidates] == 0)
+        safe[self.games, (self.dirs + 2) % 4] = False                           # Can't reverse
+
+        fx, fy = self.food % GRID_W, self.food // GRID_W
+        cx, cy = candidates % GRID_W, candidates // GRID_W
+        distance = np.abs(cx - fx[:, None]) + np.abs(cy - fy[:, None])
+        distance = distance + self.rng.random(distance.shape) * noise * 4       # Random tie breaks / exploration
+        distance[~safe] = 1e9
+        return distance.argmin(axis=1)
+
+
+def run_batch(n_games=1024, n_ticks=1000, level_num=1, win_score=None, seed=None, policy='greedy',
+              starve_ticks=None):
+    """Play n_games in parallel for n_ticks, returns stats of finished games"""
+    env = BatchEnv(n_games, level_num, win_score, seed, starve_ticks)
+    for _ in range(n_ticks):
+        if policy == 'greedy': env.step(env.greedy_actions())
+        else: env.step(env.rng.integers(-1, 4, n_games))  # Random turns
+    return {'games': env.games_done, 'wins': env.wins, 'timeouts': env.timeouts, 'score': env.total_score,
+            'ticks': env.total_ticks, 'steps': n_games * n_ticks}
+
+
+def run_parallel(n_games=1024, n_ticks=1000, level_num=1, workers=None, win_score=None, seed=0, policy='greedy',
+                 starve_ticks=None):
+    """Split games over a process pool, returns combined stats with games/second"""
+    workers = workers or 1
+    per_worker = -(-n_games // workers)
+    started = time.perf_counter()
+
+    if workers == 1:
+        results = [run_batch(n_games, n_ticks, level_num, win_score, seed, policy, starve_ticks)]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            jobs = [pool.submit(run_batch, per_worker, n_ticks, level_num, win_score,
+                                None if seed is None else seed + i, policy, starve_ticks)  # None: fresh entropy per worker
+                    for i in range(workers)]
+            results = [job.result() for job in jobs]
+
+    elapsed = time.perf_counter() - started
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+    totals['seconds'] = elapsed
+    totals['games_per_second'] = totals['games'] / elapsed
+    totals['steps_per_second'] = totals['steps'] / elapsed
+    return totals
+
+
+if __name__ == '__main__':
+    # Usage: python batch_sim.py [level] [games] [ticks] [workers]
+    args = [int(arg) for arg in sys.argv[1:5]]
+    level_num, n_games, n_ticks, workers = args + [1, 4096, 500, 1][len(args):]
+
+    stats = run_parallel(n_games, n_ticks, level_num, workers)
+    games = max(stats['games'], 1)
+    print(f"level {level_num} layout (cell model: constant speed, regular food only): "
+          f"{stats['games']} games finished, {stats['wins']} won, {stats['timeouts']} timed out, "
+          f"avg score {stats['score'] / games:.2f}, avg length {stats['ticks'] / games:.1f} ticks")
+    print(f"{stats['seconds']:.2f} s, {stats['games_per_second']:.0f} games/s, "
+          f"{stats['steps_per_second']:.0f} game ticks/s ({workers} worker(s))")
@@ -0,0 +1,190 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Headless: no window needed
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json
+import random
+import subprocess
+import sys
+import time
+import pygame as pg
+from main_snake import Game, Level, Food, Player, Snake, SpecialFood, SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Benchmarks of the engine hot paths. Each result is seconds per call (best of several repeats).
+# Results are appended to bench_history.json and compared to earlier runs:
+#   python benchmark_snake.py [--quick] [--no-save] [--threshold 0.25]
+HISTORY_FILE = "bench_history.json"
+LEVELS  = [1, 2, 3]
+LENGTHS = [10, 100, 1000, 5000]
+FILLS   = [0.1, 0.3, 0.6]
+CELL    = 20  # Snake segment size
+
+
+def measure(run, setup=None, number=100, repeat=5):
+    """Best time per call of run(state) over repeats, setup() builds fresh state each repeat"""
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        for _ in range(number):
+            run(state)
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def free_cells(level):
+    """Top-left corners of 20px cells not touching walls or border"""
+    cells = []
+    for x in range(CELL, SCREEN_WIDTH - CELL, CELL):
+        for y in range(CELL, SCREEN_HEIGHT - CELL, CELL):
+            if not level.check_collision(pg.Rect(x, y, CELL, CELL)): cells.append((x, y))
+    return cells
+
+
+def body_over(cells, length, fill, rng):
+    """Snake body of given length spread over fill ratio of the free cells"""
+    covered = rng.sample(cells, max(1, int(len(cells) * fill)))
+    return [pg.Rect(*covered[i % len(covered)], CELL, CELL) for i in range(length)]
+
+
+def straight_start(level, step, moves):
+    """Head position and direction with at least `moves` collision-free steps"""
+    for x, y in free_cells(level):
+        for dx, dy in ((step, 0), (-step, 0), (0, step), (0, -step)):
+            head = pg.Rect(x, y, CELL, CELL)
+            if all(not level.check_collision(head.move(dx * i, dy * i)) for i in range(1, moves + 1)):
+                return (x, y), (dx, dy)
+    raise Exception("No free straight run on level {0}".format(level.level_num))
+
+
+def bench_move(level, length, number):
+    """Snake.move: head moves along a free straight line, tail segments parked behind it"""
+    snake = Snake()
+    (x, y), direction = straight_start(level, snake.step, number)
+
+    def setup():
+        snake.direction = direction
+        head = pg.Rect(x, y, CELL, CELL)
+        behind = head.move(-direction[0], -direction[1])
+        snake.body = [head] + [behind.copy() for _ in range(length - 1)]
+        return snake
+
+    return measure(lambda snake: snake.move(level), setup, number)
+
+
+def bench_collision(level, number):
+    """Level.check_collision for random snake-sized rects"""
+    rng = random.Random(1)
+    rects = [pg.Rect(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT), CELL, CELL) for _ in range(number)]
+
+    def setup():
+        return iter(rects)
+
+    return measure(lambda rects: level.check_collision(next(rects)), setup, number)
+
+
+def bench_food(level, length, fill, number, cells):
+    """Food.generate_new_postion with a snake covering part of the board"""
+    snake = Snake()
+    snake.body = body_over(cells, length, fill, random.Random(length))
+    food = Food(rng=random.Random(2), level=level)
+    return measure(lambda state: food.generate_new_postion(snake), None, number)
+
+
+def bench_special_food(level, length, fill, number, cells):
+    """SpecialFood.update on its spawn tick: every call places the special food (rejection sampling)"""
+    snake = Snake()
+    snake.body = body_over(cells, length, fill, random.Random(length))
+    special = SpecialFood(rng=random.Random(3), level=level)
+
+    def spawn(state):
+        special.active = False
+        special.timer  = special.spawn_interval - 1  # Next update spawns
+        special.update(snake)
+
+    return measure(spawn, None, number)
+
+
+def bench_draw(game, level_num, length, number, cells):
+    """Game.draw of the playing screen, between ticks (interpolated)"""
+    game.player = Player("bench", level_num, 0)
+    game.start_game()
+    game.snake.body = body_over(cells, length, 1.0, random.Random(length))
+    game.snake.score = length
+    return measure(lambda state: game.draw(0.5), None, number)
+
+
+def run_benchmarks(quick=False):
+    """Run every benchmark, returns {name: seconds per call}"""
+    lengths = [10, 1000] if quick else LENGTHS
+    fills   = [0.3] if quick else FILLS
+    scale   = 0.2 if quick else 1.0
+    results = {}
+
+    game = Game()
+    for level_num in LEVELS:
+        level = Level(level_num)
+        cells = free_cells(level)
+        results[f"check_collision[level={level_num}]"] = bench_collision(level, int(2000 * scale) or 1)
+
+        for length in lengths:
+            results[f"move[level={level_num},len={length}]"] = bench_move(level, length, 20)
+            results[f"draw[level={level_num},len={length}]"] = bench_draw(game, level_num, length, int(20 * scale) or 1, cells)
+
+            for fill in fills:
+                key = f"level={level_num},len={length},fill={fill}"
+                results[f"food[{key}]"] = bench_food(level, length, fill, int(50 * scale) or 1, cells)
+                results[f"special_spawn[{key}]"] = bench_special_food(level, length, fill, int(300 * scale) or 1, cells)
+    return results
+
+
+def load_history(path=HISTORY_FILE):
+    """Earlier runs, oldest first"""
+    if not os.path.exists(path): return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(results, history, threshold, runs=5):
+    """Benchmarks slower than the median of the last runs by more than threshold (ratio)"""
+    regressions = []
+    for name, seconds in results.items():
+        previous = sorted(run["results"][name] for run in history[-runs:] if name in run["results"])
+        if not previous: continue
+        baseline = previous[len(previous) // 2]
+        if seconds > baseline * (1 + threshold):
+            regressions.append((name, baseline, seconds))
+    return regressions
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    quick = "--quick" in sys.argv
+    threshold = 0.25
+    if "--threshold" in sys.argv: threshold = float(sys.argv[sys.argv.index("--threshold") + 1])
+
+    results = run_benchmarks(quick)
+    for name, seconds in results.items():
+        print(f"{name:<48}{seconds * 1e6:12.2f} us")
+
+    history = load_history()
+    same_mode = [run for run in history if run.get("quick") == quick]  # Compare like with like
+    regressions = find_regressions(results, same_mode, threshold)
+    for name, baseline, seconds in regressions:
+        print(f"REGRESSION {name}: {baseline * 1e6:.2f} us -> {seconds * 1e6:.2f} us")
+
+    if "--no-save" not in sys.argv:
+        history.append({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": git_commit(),
+                        "quick": quick, "results": results})
+        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=1)
+
+    pg.quit()
+    sys.exit(1 if regressions else 0)
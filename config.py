@@ -15,6 +15,14 @@ def load_config(filename='database.ini', section='postgresql'):
 
     return config
 
+def load_replicas(filename='database.ini', section='postgresql'):
+    """ Configs of every [<section>_replica...] section, read-only copies of section's server """
+    parser = ConfigParser()
+    parser.read(filename)
+
+    prefix = section + '_replica'
+    return [load_config(filename, name) for name in parser.sections() if name.startswith(prefix)]
+
 if __name__ == '__main__':
     config = load_config()
     print(config)
\ No newline at end of file
@@ -18,6 +18,24 @@ def create_tables():
                 level INTEGER NOT NULL,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
+            """,
+            # Push every new score to LISTEN users_score (see score_listener.py)
+            """
+            CREATE OR REPLACE FUNCTION notify_users_score() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('users_score', json_build_object(
+                    'score_id', NEW.score_id,
+                    'user_name', (SELECT user_name FROM users WHERE user_id = NEW.user_id),
+                    'score', NEW.score,
+                    'level', NEW.level)::text);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS users_score_notify ON users_score;
+
+            CREATE TRIGGER users_score_notify AFTER INSERT ON users_score
+                FOR EACH ROW EXECUTE FUNCTION notify_users_score();
             """]
 
     try:
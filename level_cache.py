@@ -0,0 +1,38 @@
+import hashlib
+import os
+import pickle
+
+# Disk cache for compiled level data.
+# Entries are keyed by a hash of the level file contents plus the settings it was compiled with,
+# so editing a level file or changing board size/colors compiles it again automatically.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".level_cache")
+
+
+def cache_key(path, params):
+    """SHA-1 of file contents and compile settings"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(repr(params).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_cached(path, params, build):
+    """Compiled data for a level file: from disk cache if present, else build() and store it"""
+    cache_file = os.path.join(CACHE_DIR, cache_key(path, params) + '.pickle')
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass  # Not cached yet (or damaged), compile again
+
+    data = build()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)  # Atomic, parallel processes never see half a file
+    except OSError as error:
+        print("Error caching level:", error)
+    return data
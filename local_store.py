@@ -0,0 +1,249 @@
+import sqlite3
+import threading
+import time
+import psycopg2
+from config import load_config
+from main_snake import Player, MAX_NAME_LENGTH
+
+# Offline-first score storage for the snake game.
+# Same interface as main_snake.Database (get_user / create_user / safe_game), but reads come from
+# memory and writes go to a local SQLite file (WAL mode); a background thread pushes new rows to
+# PostgreSQL in batched transactions and pulls back better remote scores.
+BATCH_SIZE = 500
+LOGIN_TIMEOUT = 2  # Seconds for connect and for the query when a name isn't known locally
+SKIPPED = 2        # users_score.synced value of rows the server rejected
+
+
+def valid_name(name):
+    """Name fits users.user_name on the server"""
+    return 0 < len(name) <= MAX_NAME_LENGTH and "\0" not in name
+
+
+class LocalStore:
+    def __init__(self, path="snake_local.db", config=None, sync_interval=5.0):
+        self.path          = path
+        self._config       = config             # PostgreSQL config, loaded on first sync if None
+        self.sync_interval = sync_interval      # Seconds between syncs
+        self.lock          = threading.Lock()   # Guards best and conn
+        self.best          = {}                 # user name -> (level, score) of best game
+        self.wanted        = set()              # Unknown names to look up on the server
+        self.wake          = threading.Event()  # Sync now
+        self.stopping      = False
+
+        self.conn = self.connect()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users(
+                user_name TEXT PRIMARY KEY
+                );
+
+            CREATE TABLE IF NOT EXISTS users_score(
+                score_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_name TEXT NOT NULL REFERENCES users(user_name),
+                score INTEGER NOT NULL,
+                level INTEGER NOT NULL,
+                timestamp TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+                synced INTEGER NOT NULL DEFAULT 0
+                );
+
+            CREATE INDEX IF NOT EXISTS users_score_unsynced ON users_score(synced) WHERE synced = 0;
+            """)
+
+        # Best game per user, kept in memory for instant logins
+        for name, level, score in self.conn.execute("""
+                SELECT user_name, level, MAX(score) FROM users_score GROUP BY user_name"""):
+            self.best[name] = (level, score)
+
+        self.thread = threading.Thread(target=self.sync_loop, name="score-sync", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        """SQLite connection in WAL mode (readers never wait for the writer)"""
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, no fsync per commit
+        return conn
+
+    @property
+    def config(self):
+        if self._config is None: self._config = load_config()
+        return self._config
+
+    def get_user(self, username):
+        """Retrieve user's best game from memory, asking the server for names not known here"""
+        with self.lock:
+            best = self.best.get(username)
+        if best is None: best = self.fetch_user(username)
+        if best is None: return None
+        return Player(username, best[0], best[1])
+
+    def fetch_user(self, username):
+        """Best game of a user only the server knows (new machine, deleted file), None if not found.
+        Only runs on a local miss (login is on the game's database thread); a slow server can't hold
+        it longer than LOGIN_TIMEOUT to connect plus LOGIN_TIMEOUT for the query"""
+        if not valid_name(username): return None
+        try:
+            with psycopg2.connect(**{**self.config, "connect_timeout": LOGIN_TIMEOUT,
+                                     "options": f"-c statement_timeout={LOGIN_TIMEOUT * 1000}"}) as pg_conn:
+                with pg_conn.cursor() as cur:
+                    cur.execute("""
+                            SELECT users_score.level, users_score.score
+                            FROM users
+                            JOIN users_score ON users.user_id = users_score.user_id
+                            WHERE users.user_name = %s
+                            ORDER BY users_score.score DESC
+                            LIMIT 1
+                            """, (username,))
+                    row = cur.fetchone()
+            pg_conn.close()
+        except Exception as error:  # Unreachable or too slow
+            print("Server not available, checking again in background:", error)
+            with self.lock:
+                self.wanted.add(username)  # Better remote score replaces ours on next sync
+            self.wake.set()
+            return None
+
+        if row is None: return None
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO users (user_name) VALUES (?)", (username,))
+            self.conn.execute("INSERT INTO users_score (user_name, score, level, synced) VALUES (?, ?, ?, 1)",
+                              (username, row[1], row[0]))
+            self.best[username] = (row[0], row[1])
+        return row
+
+    def create_user(self, username):
+        """Create a new user locally, synced to the server later"""
+        if not valid_name(username):
+            print(f"Error creating user: name must be 1-{MAX_NAME_LENGTH} characters without NUL")
+            return None
+        try:
+            with self.lock:
+                self.conn.execute("INSERT OR IGNORE INTO users (user_name) VALUES (?)", (username,))
+                self.conn.execute("INSERT INTO users_score (user_name, score, level) VALUES (?, ?, ?)",
+                                  (username, 0, 1))
+                self.best.setdefault(username, (1, 0))
+            self.wake.set()
+            return Player(username, 1, 0)
+
+        except Exception as error:
+                print("Error creating user:", error)
+                return None
+
+    def safe_game(self, player):
+        """Save player's game progress locally, synced to the server later"""
+        if not valid_name(player.name):
+            print(f"Error saving game: name must be 1-{MAX_NAME_LENGTH} characters without NUL")
+            return False
+        try:
+            with self.lock:
+                self.conn.execute("INSERT OR IGNORE INTO users (user_name) VALUES (?)", (player.name,))
+                self.conn.execute("INSERT INTO users_score (user_name, score, level) VALUES (?, ?, ?)",
+                                  (player.name, player.score, player.level))
+                if player.score >= self.best.get(player.name, (0, -1))[1]:
+                    self.best[player.name] = (player.level, player.score)
+            self.wake.set()
+            return True
+
+        except Exception as error:
+                print("Error saving game:", error)
+                return False
+
+    def sync_loop(self):
+        """Background thread: sync periodically or when woken"""
+        conn = self.connect()  # Own connection for this thread
+        while not self.stopping:
+            self.wake.wait(self.sync_interval)
+            self.wake.clear()
+            try:
+                while self.sync_once(conn) == BATCH_SIZE: pass  # Catch up on backlog
+            except Exception as error:
+                print("Error syncing scores:", error)
+                time.sleep(self.sync_interval)  # Server unreachable, retry later
+        conn.close()
+
+    def sync_once(self, conn):
+        """Push one batch of unsynced rows and pull better remote scores, returns rows pushed"""
+        rows = conn.execute("""
+                SELECT score_id, user_name, score, level, timestamp FROM users_score
+                WHERE synced = 0 ORDER BY score_id LIMIT ?""", (BATCH_SIZE,)).fetchall()
+        with self.lock:
+            names = sorted(name for name in set(self.best) | self.wanted if valid_name(name))
+
+        skipped = set()  # score_ids the server rejects
+        with psycopg2.connect(**{**self.config, "connect_timeout": 5}) as pg_conn:
+            with pg_conn.cursor() as cur:
+                if rows:
+                    try:
+                        self.push(cur, rows)
+                        pg_conn.commit()
+                    except psycopg2.OperationalError:
+                        raise  # Server gone, whole batch retried later
+                    except Exception as batch_error:
+                        # One bad row fails the batch: push one by one and skip rows whose data the
+                        # server rejects. Anything else (schema, permissions, read-only server) is
+                        # raised and the batch stays unsynced for the next attempt.
+                        print("Error syncing batch, retrying one by one:", batch_error)
+                        pg_conn.rollback()
+                        rejected = {}  # Row -> error
+                        for row in rows:
+                            try:
+                                self.push(cur, [row])
+                                pg_conn.commit()
+                            except (psycopg2.DataError, psycopg2.IntegrityError, ValueError) as error:
+                                # ValueError: psycopg2 refuses NUL in strings before sending
+                                pg_conn.rollback()
+                                rejected[row] = error
+                        if len(rows) > 1 and len(rejected) == len(rows):
+                            raise batch_error  # Every row failed: a server problem, not bad rows
+                        for row, error in rejected.items():
+                            print("Skipping score the server rejects:", row, error)
+                            skipped.add(row[0])
+
+                # Best remote game of every user we know about
+                cur.execute("""
+                        SELECT DISTINCT ON (users.user_name) users.user_name, users_score.level, users_score.score
+                        FROM users
+                        JOIN users_score ON users.user_id = users_score.user_id
+                        WHERE users.user_name = ANY(%s)
+                        ORDER BY users.user_name, users_score.score DESC
+                        """, (names,))
+                remote = cur.fetchall()
+                pg_conn.commit()
+
+        # Mark pushed rows; remote scores better than ours win (same rule as get_user on the server)
+        conn.execute("BEGIN")
+        conn.executemany("UPDATE users_score SET synced = ? WHERE score_id = ?",
+                         [(SKIPPED if row[0] in skipped else 1, row[0]) for row in rows])
+        with self.lock:
+            for name, level, score in remote:
+                self.wanted.discard(name)
+                if score > self.best.get(name, (0, -1))[1]:
+                    self.best[name] = (level, score)
+                    conn.execute("INSERT OR IGNORE INTO users (user_name) VALUES (?)", (name,))
+                    conn.execute("INSERT INTO users_score (user_name, score, level, synced) VALUES (?, ?, ?, 1)",
+                                 (name, score, level))
+        conn.execute("COMMIT")
+        return len(rows)
+
+    @staticmethod
+    def push(cur, rows):
+        """Insert local rows on the server (caller commits)"""
+        cur.executemany("INSERT INTO users (user_name) VALUES (%s) ON CONFLICT (user_name) DO NOTHING",
+                        [(name,) for name in {row[1] for row in rows}])
+        # Local timestamp identifies the game, so a batch resent after a failure isn't stored twice
+        cur.executemany("""
+                INSERT INTO users_score (user_id, score, level, timestamp)
+                SELECT users.user_id, %(score)s, %(level)s, %(timestamp)s FROM users
+                WHERE users.user_name = %(name)s AND NOT EXISTS (
+                    SELECT 1 FROM users_score
+                    WHERE user_id = users.user_id AND score = %(score)s
+                      AND level = %(level)s AND timestamp = %(timestamp)s)
+                """, [{"name": name, "score": score, "level": level, "timestamp": timestamp}
+                      for score_id, name, score, level, timestamp in rows])
+
+    def close(self, timeout=5.0):
+        """Stop syncing after one last attempt"""
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout)
+        with self.lock:
+            self.conn.close()
@@ -1,32 +1,72 @@
 # Import necessary libraries
+import time       # For time-related functions
+IMPORT_START = time.perf_counter()  # Startup time measurement starts here
+
 import pygame as pg  # For game development
-import psycopg2     # For PostgreSQL database connection
+import pygame.freetype  # For freetype fonts (pg.freetype)
 import random      # For random number generation
-import time       # For time-related functions
 import sys       # For system-specific parameters and functions
+import os        # For replay and level file paths
+import json      # For level files
+import zlib      # For state hashing (crc32)
+from array import array  # For packing state hash input
+from collections import OrderedDict, deque  # For LRU text cache and input queue
+from concurrent.futures import ThreadPoolExecutor  # For database calls off the game loop
+from functools import lru_cache, cached_property  # For lazy initialization
 from config import load_config  # Custom config loader
+import level_cache  # Disk cache of compiled levels
+from profiling import FrameProfiler, NullProfiler  # Opt-in frame timing
 from enum import Enum, auto  # For creating enumerations
 
-# Initialize pygame and pygame font module
-pg.init()
-pg.font.init()
-
 # Game constants
 SCREEN_WIDTH  = 1080  # Width of game window
 SCREEN_HEIGHT = 720  # Height of game window
-FPS = 15  # Frames per second for game loop
+FPS = 15  # Simulation ticks per second
+RENDER_FPS = 60  # Default frames per second for rendering
+SIM_STEP = 1 / FPS  # Seconds per simulation tick
+MAX_TICKS_PER_FRAME = 5  # Drop simulation backlog after long stalls
+DB_TIMEOUT = 10  # Seconds the game waits for a database call before giving up
+MAX_NAME_LENGTH = 255  # users.user_name is VARCHAR(255)
+
+def init_pygame():
+    """Initialize only the pygame subsystems the game uses (safe to call twice)"""
+    if not pg.display.get_init(): pg.display.init()
+    if not pg.font.get_init():    pg.font.init()
+    if not pg.freetype.get_init(): pg.freetype.init()
+
+@lru_cache(maxsize=None)
+def find_font_path(name):
+    """Look up system font file once (scanning system fonts is slow)"""
+    return pg.font.match_font(name)  # None means pygame default font
+
+@lru_cache(maxsize=None)
+def load_font(name, size, freetype=True):
+    """Load font on first use, shared between all users of same name/size"""
+    init_pygame()
+    path = find_font_path(name)
+    if freetype: return pg.freetype.Font(path, size)
+    return pg.font.Font(path, size)
 
 # Database class to handle all database operations
 class Database:
-    def __init__(self):
-        # Load database configuration
-        self.config = load_config()
+    @cached_property
+    def config(self):
+        """Load database configuration on first use"""
+        config = load_config()
+        config.setdefault("connect_timeout", "5")  # Don't hang forever on unreachable server
+        return config
+
+    @cached_property
+    def replicas(self):
+        """Read/write router: reads go to [postgresql_replica...] sections when there are any"""
+        from replicas import ReplicaRouter
+        return ReplicaRouter(self.config)
 
     def get_user(self, username):
         """Retrieve user data from database"""
         try:
-            # Connect to database
-            with psycopg2.connect(**self.config) as conn:
+            # Connect to a replica, or the primary right after this player saved
+            with self.replicas.connect_read(username) as conn:
                 with conn.cursor() as cur:
                     # SQL query to get user data with their highest score
                     cur.execute("""
@@ -52,7 +92,7 @@ class Database:
     def create_user(self, username):
         """Create a new user in database"""
         try:
-            with psycopg2.connect(**self.config) as conn:
+            with self.replicas.connect_write(username) as conn:
                 with conn.cursor() as cur:
                     # Insert new user or ignore if already exists
                     cur.execute("""
@@ -88,7 +128,7 @@ class Database:
     def safe_game(self, player):
         """Save player's game progress to database"""
         try:
-            with psycopg2.connect(**self.config) as conn:
+            with self.replicas.connect_write(player.name) as conn:
                 with conn.cursor() as cur:
                     # Get user ID
                     cur.execute("SELECT user_id FROM users WHERE user_name = %s", (player.name,))
@@ -129,6 +169,7 @@ class GameState(Enum):
     Paused  = auto()  # Paused game
     Win     = auto()  # Level completed
     Lose    = auto()  # Game over
+    Connecting = auto()  # Waiting for database
 
 # Button rectangle definitions
 class Buttons:
@@ -138,6 +179,34 @@ class Buttons:
     SAVE_GAME   = pg.Rect(100, 400, 340, 60)  # Save game button
     LOGIN       = pg.Rect(400, 500, 200, 50)  # Login button
 
+# Cache of rendered text surfaces shared by Game and TextInput
+class TextCache:
+    def __init__(self, max_size=128):
+        self.max_size = max_size      # Max number of cached surfaces
+        self.surfaces = OrderedDict() # (font, text, color) -> surface, oldest first
+
+    def render(self, font, text, color):
+        """Return rendered text surface, rasterizing only on cache miss"""
+        key = (font, text, tuple(color))  # pg.Color is unhashable, use tuple
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)  # Mark as recently used
+            return surface
+
+        if isinstance(font, pg.freetype.Font): surface = font.render(text, color)[0]  # freetype returns (surface, rect)
+        else: surface = font.render(text, True, color)  # pg.font returns surface
+
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:  # Evict least recently used
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def draw(self, surface, pos, font, text, color):
+        """Blit cached text surface at position"""
+        surface.blit(self.render(font, text, color), pos)
+
+text_cache = TextCache()  # Shared text cache
+
 # Player class to store player data
 class Player:
     def __init__(self, name, level=1, score=0):
@@ -155,6 +224,7 @@ class Snake:
         self.step_grow = 2               # Speed increase when growing
         self.speed_increase_interval = 3 # Score interval for speed increase
         self.initial_position()          # Set initial position
+        self.last_tail = self.body[-1].copy()  # Tail removed by last move (for interpolation)
 
     def initial_position(self):
         """Set snake to starting position"""
@@ -169,13 +239,13 @@ class Snake:
         dx, dy   = self.direction  # Direction vector
         new_head = pg.Rect(head_x + dx, head_y + dy, self.body_size, self.body_size)  # New head position
 
-        # Check for collisions with walls or self
-        if current_level.check_collision(new_head) or new_head in self.body[1:]:
+        # Check for collisions with walls (whole swept path, so fast snakes can't pass through) or self
+        if current_level.check_collision(new_head.union(self.body[0])) or new_head in self.body[1:]:
             return False  # Game over
 
         # Move snake by adding new head and removing tail
         self.body.insert(0, new_head)
-        self.body.pop()
+        self.last_tail = self.body.pop()
         return True  # Move successful
 
     def grow(self):
@@ -192,74 +262,112 @@ class Snake:
         if (dx, dy) != (-self.direction[0], -self.direction[1]):
             self.direction = (dx, dy)
 
-    def draw(self, surface):
-        """Draw snake on surface"""
+    def pad_body(self):
+        """Add segments so body length matches score"""
         if len(self.body) != self.score:
             for i in range(len(self.body), self.score):
                 self.body.append(self.body[-1].copy())
+
+    def draw(self, surface, alpha=1.0):
+        """Draw snake on surface, interpolated between last and current tick (alpha 0..1)"""
+        if alpha >= 1.0:
+            for segment in self.body:
+                pg.draw.rect(surface, Colors.Snake, segment)
+            return
+
+        last = len(self.body) - 1
         for i, segment in enumerate(self.body):
-            pg.draw.rect(surface, Colors.Snake, segment)
+            previous = self.body[i + 1] if i < last else self.last_tail  # Where this segment was a tick ago
+            x = previous.x + (segment.x - previous.x) * alpha
+            y = previous.y + (segment.y - previous.y) * alpha
+            pg.draw.rect(surface, Colors.Snake, (round(x), round(y), segment.width, segment.height))
+
+# Level files and compiled level data
+LEVEL_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels")  # levels/level<N>.json
+GRID_CELL  = 20         # Cell size of level occupancy bitmap (snake segment size)
+FOOD_SIZES = (30, 40)   # Food and special food sizes that get spawn cell lists
+
+def level_path(level_num):
+    """Path of level data file"""
+    return os.path.join(LEVEL_DIR, f"level{level_num}.json")
+
+def count_levels():
+    """Number of consecutive level files level1.json, level2.json, ..."""
+    count = 0
+    while os.path.exists(level_path(count + 1)): count += 1
+    return count
+
+LEVEL_COUNT = count_levels()  # Last level of the game
+
+def compile_level(path):
+    """Compile level file: walls, occupancy bitmap, spawn cells per food size and background pixels"""
+    with open(path, encoding="utf-8") as f:
+        walls = [tuple(wall) for wall in json.load(f)["walls"]]
+    rects = [pg.Rect(wall) for wall in walls]
+    board = pg.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    # Occupancy bitmap: 1 = cell touches a wall or the screen border (Level.check_collision rules)
+    grid_w, grid_h = SCREEN_WIDTH // GRID_CELL, SCREEN_HEIGHT // GRID_CELL
+    bitmap = bytearray(grid_w * grid_h)
+    for y in range(grid_h):
+        for x in range(grid_w):
+            cell = pg.Rect(x * GRID_CELL, y * GRID_CELL, GRID_CELL, GRID_CELL)
+            if x in (0, grid_w - 1) or y in (0, grid_h - 1) or cell.collidelist(rects) != -1:
+                bitmap[y * grid_w + x] = 1
+
+    # Food positions: on food size grid, inside border, not touching walls
+    spawn = {}
+    for size in FOOD_SIZES:
+        cells = []
+        for x in range(size, SCREEN_WIDTH - size, size):
+            for y in range(size, SCREEN_HEIGHT - size, size):
+                if pg.Rect(x, y, size, size).collidelist(rects) == -1: cells.append((x, y))
+        spawn[size] = cells
+
+    # Pre-rendered ground and walls
+    background = pg.Surface(board.size)
+    background.fill(Colors.Ground)
+    for rect in rects: pg.draw.rect(background, Colors.Wall, rect)
+
+    return {"walls": walls, "grid_size": (grid_w, grid_h), "bitmap": bytes(bitmap), "spawn": spawn,
+            "background": pg.image.tobytes(background, "RGB")}
+
+@lru_cache(maxsize=None)
+def load_level(level_num):
+    """Compiled level data, from disk cache when the level file is unchanged"""
+    path = level_path(level_num)
+    params = (SCREEN_WIDTH, SCREEN_HEIGHT, GRID_CELL, FOOD_SIZES, tuple(Colors.Ground), tuple(Colors.Wall))
+    return level_cache.load_cached(path, params, lambda: compile_level(path))
+
+@lru_cache(maxsize=None)
+def level_background(level_num):
+    """Background surface of a level, created once per process"""
+    surface = pg.image.frombytes(load_level(level_num)["background"], (SCREEN_WIDTH, SCREEN_HEIGHT), "RGB")
+    if pg.display.get_surface(): surface = surface.convert()  # Match display format for fast blits
+    return surface
 
 # Level class for game levels
 class Level:
     def __init__(self, level_num):
+        data = load_level(level_num)
         self.game_board = pg.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)  # Full game area
         self.level_num  = level_num  # Current level number
-        self.walls      = []  # Wall rectangles
-        self.wall1 = [
-                pg.Rect(100, 0, 15, 800),
-                pg.Rect(700, 200, 15, 700),
-                pg.Rect(700, 500, 300, 15),
-                pg.Rect(800, 700, 280, 15),
-                pg.Rect(800, 200, 280, 15),
-                pg.Rect(0, 900, 715, 15),
-                pg.Rect(300, 200, 415, 15)
-            ]
-        self.wall2 = [
-                pg.Rect(100, 0, 15, 1000),
-                pg.Rect(1000, 100, 15, 980),
-                pg.Rect(700, 200, 15, 785),
-                pg.Rect(300, 100, 15, 700),
-                pg.Rect(200, 100, 815, 15),
-                pg.Rect(100, 985, 800, 15)
-            ]
-        self.wall3 = [
-                pg.Rect(0, 600, 900, 15),
-                pg.Rect(100, 400, 980, 15),
-                pg.Rect(114, 60, 15, 340),
-                pg.Rect(114, 600, 15, 400),
-                pg.Rect(314, 60, 15, 340),
-                pg.Rect(314, 600, 15, 400),
-                pg.Rect(514, 60, 15, 340),
-                pg.Rect(514, 600, 15, 400),
-                pg.Rect(714, 60, 15, 340),
-                pg.Rect(714, 600, 15, 400)
-            ]
-
-        self._setup_level()  # Setup level walls
-
-    def _setup_level(self):
-        """Create walls for each level"""
-        if self.level_num == 1:
-            self.walls = self.wall1
-
-        elif self.level_num == 2:
-            self.walls = self.wall2
-
-        elif self.level_num == 3:
-            self.walls = self.wall3
-        
+        self.walls      = [pg.Rect(wall) for wall in data["walls"]]  # Wall rectangles
+        self.bitmap     = data["bitmap"]  # Blocked cells, GRID_CELL sized, row by row
+        self.grid_size  = data["grid_size"]  # Bitmap width and height in cells
+
+    def spawn_cells(self, size):
+        """Valid food positions for food of given size"""
+        return load_level(self.level_num)["spawn"][size]
+
     def draw(self, surface):
         """Draw level on surface"""
-        pg.draw.rect(surface, Colors.Ground, self.game_board)  # Draw ground
-        for wall in self.walls:  # Draw all walls
-            pg.draw.rect(surface, Colors.Wall, wall)
+        surface.blit(level_background(self.level_num), self.game_board)  # Ground and walls
 
     def check_collision(self, rect):
         """Check if rectangle collides with any wall or screen edge"""
-        for wall in self.walls:
-            if rect.colliderect(wall):
-                return True
+        if rect.collidelist(self.walls) != -1:
+            return True
 
         return (rect.left <= 0 or rect.right >= SCREEN_WIDTH or rect.top <= 0 or rect.bottom >= SCREEN_HEIGHT)
     
@@ -268,17 +376,14 @@ class Level:
         if food_rect.x <= 0 or food_rect.x >= SCREEN_WIDTH or food_rect.y <= 0 or food_rect.y >= SCREEN_HEIGHT:
             return True
 
-        for wall in self.walls:
-            if wall.colliderect(food_rect): return True
- 
-        return False
-
-larila = Level(1)
+        return food_rect.collidelist(self.walls) != -1
 
 # Food class for regular food
 class Food:
-    def __init__(self, size=30):
+    def __init__(self, size=30, rng=None, level=None):
         self.size = size  # Food size
+        self.rng  = rng or random  # Random source (seeded random.Random for replays)
+        self.spawn_cells = (level or Level(1)).spawn_cells(size)  # Positions clear of walls and border
         self.position = (0, 0)  # Food position
         self.rect = pg.Rect(0, 0, size, size)  # Food rectangle
         self.generate_new_postion()  # Set initial position
@@ -289,31 +394,12 @@ class Food:
         else: snake_body = snake.body  # Get snake body segments
 
         while True:
-            # Random position within screen bounds
-            x = random.randint(0, (SCREEN_WIDTH - self.size) // self.size) * self.size
-            y = random.randint(0, (SCREEN_HEIGHT - self.size) // self.size) * self.size
+            # Random position among precompiled free cells, only the snake needs checking
+            x, y = self.rng.choice(self.spawn_cells)
             self.rect.x = x
             self.rect.y = y
 
-            # Check for collisions
-            collision = False
-            for segment in snake_body:  # Check snake collision
-                if self.rect.colliderect(segment):
-                    collision = True
-                    break
-
-
-            if not collision:
-                if self.rect.x <= 0 or self.rect.x >= SCREEN_WIDTH - self.size or self.rect.y <= 0 or self.rect.y >= SCREEN_HEIGHT - self.size:
-                    collision = True
-
-            if not collision:
-                for wall in larila.wall1 + larila.wall2 + larila.wall3:
-                    if self.rect.colliderect(wall):
-                        collision = True
-                        break
-
-            if not collision:  # Valid position found
+            if self.rect.collidelist(snake_body) == -1:  # Valid position found
                 self.position = (x, y)
                 return
 
@@ -323,8 +409,8 @@ class Food:
 
 # Special food class (inherits from Food)
 class SpecialFood(Food):
-    def __init__(self):
-        super().__init__(size=40)     # Larger size than regular food
+    def __init__(self, rng=None, level=None):
+        super().__init__(size=40, rng=rng, level=level)  # Larger size than regular food
         self.color  = Colors.SpFood   # Special color
         self.timer  = 0               # Timer for spawn/lifetime
         self.active = False           # Whether special food is active
@@ -356,15 +442,82 @@ class SpecialFood(Food):
         """Draw only if active"""
         if self.active: pg.draw.rect(surface, self.color, self.rect)
 
+# Headless simulation of one game round (no window needed)
+class Simulation:
+    def __init__(self, level_num=1, score=0, seed=None):
+        if seed is None: seed = random.randrange(2 ** 32)  # New random round
+        self.seed         = seed                        # Seed for food positions
+        self.rng          = random.Random(seed)         # Per-round random source
+        self.level_num    = level_num                   # Level being played
+        initial_speed     = 7 + (level_num * 2 - 1) * 2 # Speed based on level
+        self.snake        = Snake(initial_speed)        # Create snake
+        self.level        = Level(level_num)            # Create level
+        self.food         = Food(rng=self.rng, level=self.level)         # Create regular food
+        self.special_food = SpecialFood(rng=self.rng, level=self.level)  # Create special food
+        self.snake.score  = score                       # Set initial score
+        self.ticks        = 0                           # Ticks simulated so far
+
+    def step(self, direction=None):
+        """Advance one tick; direction is a unit vector (dx, dy) or None. Returns resulting GameState"""
+        self.ticks += 1
+        state = GameState.Playing
+        snake = self.snake
+
+        if direction is not None:
+            dx, dy = direction
+            snake.set_direction(dx * snake.step, dy * snake.step)
+
+        # Move snake and check for game over
+        if not snake.move(self.level):
+            return GameState.Lose
+
+        # Check if snake ate regular food
+        if snake.body[0].colliderect(self.food.rect):
+            snake.grow()  # Grow snake
+            self.food.generate_new_postion(snake)  # New food position
+
+        # Check if level completed (score threshold)
+        if snake.score >= self.level_num * 5:
+            state = GameState.Win
+
+        # Update special food
+        self.special_food.update(snake)
+
+        # Check if snake ate special food
+        if (self.special_food.active and snake.body[0].colliderect(self.special_food.rect)):
+            snake.grow()  # Grow snake
+            snake.score  += 1  # Bonus score
+            self.special_food.active = False  # Deactivate special food
+            self.special_food.timer  = 0  # Reset timer
+
+        snake.pad_body()  # Match body length to score
+        return state
+
+    def state_hash(self):
+        """CRC32 of everything that affects later ticks"""
+        snake, special = self.snake, self.special_food
+        values = array('i', [self.ticks, snake.score, snake.step, *snake.direction,
+                             self.food.rect.x, self.food.rect.y,
+                             special.active, special.timer, special.rect.x, special.rect.y])
+        for segment in snake.body:
+            values.append(segment.x)
+            values.append(segment.y)
+        return zlib.crc32(values.tobytes())
+
 # Text input box for login
 class TextInput:
     def __init__(self, x, y, width, height, font_size=32):
         self.rect  = pg.Rect(x, y, width, height)  # Input box rectangle
         self.color = Colors.TextInput              # Box color
         self.text  = ''                            # Current text
-        self.font  = pg.font.SysFont('Comic Sans MS', font_size)  # Text font
+        self.font_size = font_size                 # Text font size
         self.activate = True  # Whether input is active
 
+    @cached_property
+    def font(self):
+        """Text font, loaded on first draw"""
+        return load_font('Comic Sans MS', self.font_size, freetype=False)
+
     def handle_event(self, event):
         """Handle input events"""
         if event.type == pg.MOUSEBUTTONDOWN:
@@ -374,26 +527,40 @@ class TextInput:
                 return True
             elif event.key == pg.K_BACKSPACE:  # Backspace
                 self.text = self.text[:-1]
-            else:  # Regular character
+            elif len(self.text) < MAX_NAME_LENGTH and event.unicode.isprintable():  # Regular character
                 self.text += event.unicode
         return False
 
     def draw(self, surface):
         """Draw input box and text"""
         pg.draw.rect(surface, self.color, self.rect, 2)  # Box with border
-        text_surface = self.font.render(self.text, True, Colors.Black)  # Render text
-        surface.blit(text_surface, (self.rect.x + 5, self.rect.y + 5))  # Draw text
+        text_cache.draw(surface, (self.rect.x + 5, self.rect.y + 5), self.font, self.text, Colors.Black)  # Draw cached text
 
 # Main game class
 class Game:
-    def __init__(self):
+    # Arrow keys -> unit direction
+    DIRECTION_KEYS = {pg.K_DOWN: (0, 1), pg.K_UP: (0, -1), pg.K_LEFT: (-1, 0), pg.K_RIGHT: (1, 0)}
+
+    def __init__(self, render_fps=RENDER_FPS, record_dir=None, profiler=None, db=None):
         # Initialize game window
+        init_pygame()
         self.screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pg.display.set_caption("Snake Game")
         self.clock  = pg.time.Clock()  # For controlling frame rate
-        self.db     = Database()  # Database handler
+        self.render_fps  = render_fps  # Frames drawn per second (independent of FPS)
+        self.input_queue = deque(maxlen=4)  # Direction presses waiting for next ticks
+        self.record_dir  = record_dir  # Save replays of played rounds here (None = off)
+        self.recorder    = None  # Replay recorder of current round
+        self.rounds_recorded = 0  # Number of replay files written
+        self.profiler    = profiler or NullProfiler()  # Per-frame phase timing (off by default)
+        self.autopilot   = None  # Presses keys for the player when set (autopilot.Autopilot)
+        self.db     = db or Database()  # Database handler (Database or local_store.LocalStore)
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="db")  # Runs database calls
+        self.db_call  = None  # (future, deadline, on_done, state to return to) while Connecting
+        self.message  = ""    # Status shown on login and pause screens
         
         # Game objects
+        self.sim           = None  # Current round simulation
         self.snake         = None  # Snake object
         self.current_level = None  # Current level
         self.food          = None  # Regular food
@@ -403,12 +570,16 @@ class Game:
         self.state      = GameState.Login  # Current game state
         self.player     = None  # Player object
         self.text_input = TextInput(400, 400, 280, 50)  # Username input
-        
-        # Fonts
-        self.title_font  = pg.freetype.SysFont("Comic Sans MS", 80)  # Large title font
-        self.button_font = pg.freetype.SysFont("Comic Sans MS", 60)  # Button font
-        self.score_font  = pg.freetype.SysFont("Comic Sans MS", 40)  # Score display
-        self.info_font   = pg.freetype.SysFont("Comic Sans MS", 30)  # Info text
+
+    # Fonts, loaded on first use
+    @cached_property
+    def title_font(self):  return load_font("Comic Sans MS", 80)  # Large title font
+    @cached_property
+    def button_font(self): return load_font("Comic Sans MS", 60)  # Button font
+    @cached_property
+    def score_font(self):  return load_font("Comic Sans MS", 40)  # Score display
+    @cached_property
+    def info_font(self):   return load_font("Comic Sans MS", 30)  # Info text
    
     def handle_events(self):
         """Handle all pygame events"""
@@ -433,18 +604,61 @@ class Game:
         """Process login attempt"""
         username = self.text_input.text.strip()  # Get username
         if username:
-            # Try to get existing user
-            self.player = self.db.get_user(username)
-            if not self.player:  # Create new user if doesn't exist
-                self.player = self.db.create_user(username)
-
-            if self.player:  # If login/create successful
-                self.state = GameState.Menu
-                self.initialize_game()
+            self.message = ""
+            self.run_db(self.login_user, username, on_done=self.finish_login, wait=True)
+
+    def login_user(self, username):
+        """Get existing user or create new one (runs on database thread)"""
+        return self.db.get_user(username) or self.db.create_user(username)
+
+    def finish_login(self, player):
+        """Login call finished"""
+        if player:  # If login/create successful
+            self.player = player
+            self.state  = GameState.Menu
+            self.initialize_game()
+        else:
+            self.state   = GameState.Login
+            self.message = "Login failed"
+
+    def run_db(self, func, *args, on_done=None, wait=False):
+        """Run database call on a worker thread; with wait, show Connecting until on_done(result)"""
+        future = self.executor.submit(func, *args)
+        if wait:
+            self.db_call = (future, time.perf_counter() + DB_TIMEOUT, on_done, self.state)
+            self.state   = GameState.Connecting
+        return future
+
+    def poll_db(self):
+        """Check waited-for database call, called every frame"""
+        if self.db_call is None: return
+        future, deadline, on_done, previous = self.db_call
+        if future.done():
+            self.db_call = None
+            try:
+                result = future.result()
+            except Exception as error:
+                print("Database error:", error)
+                result = None
+            on_done(result)
+        elif time.perf_counter() > deadline:
+            self.cancel_db("Server not responding")
+
+    def cancel_db(self, message):
+        """Stop waiting for database call (a call already running finishes in background, result ignored)"""
+        future, deadline, on_done, previous = self.db_call
+        future.cancel()
+        self.db_call = None
+        self.state   = previous
+        self.message = message
+
+    def player_snapshot(self):
+        """Copy of player for saving on database thread"""
+        return Player(self.player.name, self.player.level, self.player.score)
 
     def handle_mouse_click(self, pos):
         """Handle mouse clicks based on game state"""
-        if   self.state == GameState.Win    and Buttons.PLAY_AGAIN.collidepoint(pos) and self.player.level == 3:  self.reset_game()# Final level complete
+        if   self.state == GameState.Win    and Buttons.PLAY_AGAIN.collidepoint(pos) and self.player.level == LEVEL_COUNT:  self.reset_game()# Final level complete
         elif self.state == GameState.Menu   and Buttons.START.collidepoint(pos):      self.start_game()# Start game
         elif self.state == GameState.Lose   and Buttons.PLAY_AGAIN.collidepoint(pos): self.reset_game()# Game over
         elif self.state == GameState.Win    and Buttons.PLAY_AGAIN.collidepoint(pos): self.next_level()# Level complete
@@ -452,11 +666,12 @@ class Game:
     
     def handle_key_press(self, key):
         """Handle keyboard input based on game state"""
+        if self.state == GameState.Connecting and key == pg.K_ESCAPE:  # Stop waiting for database
+            self.cancel_db("Cancelled")
+            return
+
         if self.state == GameState.Playing:  # Gameplay controls
-            if key == pg.K_DOWN:   self.snake.set_direction(0, self.snake.step)# Move down
-            if key == pg.K_UP:     self.snake.set_direction(0, -self.snake.step)# Move up
-            if key == pg.K_LEFT:   self.snake.set_direction(-self.snake.step, 0)# Move left
-            if key == pg.K_RIGHT:  self.snake.set_direction(self.snake.step, 0)# Move right
+            if key in self.DIRECTION_KEYS: self.input_queue.append(self.DIRECTION_KEYS[key])# Applied one per tick
             if key == pg.K_ESCAPE: self.state = GameState.Paused# Pause game
             if key == pg.K_p:      self.state = GameState.Paused # Pause game (alternative key)
                 
@@ -466,17 +681,28 @@ class Game:
             if key == pg.K_s:  # Save game
                 self.player.score = self.snake.score
                 self.player.level = self.current_level.level_num
-                self.db.safe_game(self.player)
+                self.run_db(self.db.safe_game, self.player_snapshot())  # Save in background
                 self.state = GameState.Playing
 
     def initialize_game(self):
         """Initialize game objects based on player level"""
-        initial_speed      = 7 + (self.player.level * 2 - 1) * 2  # Speed based on level
-        self.snake         = Snake(initial_speed)  # Create snake
-        self.current_level = Level(self.player.level)  # Create level
-        self.food          = Food()  # Create regular food
-        self.special_food  = SpecialFood()  # Create special food
-        self.snake.score   = self.player.score  # Set initial score
+        self.finish_recording()  # Save previous round
+        self.sim           = Simulation(self.player.level, self.player.score)  # New round
+        self.snake         = self.sim.snake  # Snake object
+        self.current_level = self.sim.level  # Current level
+        self.food          = self.sim.food  # Regular food
+        self.special_food  = self.sim.special_food  # Special food
+        self.input_queue.clear()  # Drop presses from previous round
+        if self.record_dir:
+            from replay import ReplayRecorder  # Only needed when recording
+            self.recorder = ReplayRecorder(self.sim)
+
+    def finish_recording(self):
+        """Save replay of current round if recording"""
+        if self.recorder is None: return
+        path = os.path.join(self.record_dir, f"round_{self.rounds_recorded + 1:03d}.snkr")
+        if self.recorder.save(path): self.rounds_recorded += 1
+        self.recorder = None
 
     def start_game(self):
         """Start the game from menu"""
@@ -485,7 +711,7 @@ class Game:
 
     def reset_game(self):
         """Reset game to initial state"""
-        if self.player.level == 3:  # Reset to level 1 if completed all levels
+        if self.player.level == LEVEL_COUNT:  # Reset to level 1 if completed all levels
             self.player.level = 1
             self.player.score = 0
         self.initialize_game()
@@ -493,11 +719,11 @@ class Game:
 
     def next_level(self):
         """Advance to next level"""
-        if self.player.level < 3:  # If not final level
+        if self.player.level < LEVEL_COUNT:  # If not final level
             self.player.level += 1  # Increase level
             self.player.score += 1  # Bonus score
             self.player.score  = self.snake.score  # Update player score
-            self.db.safe_game(self.player)  # Save progress
+            self.run_db(self.db.safe_game, self.player_snapshot())  # Save progress in background
             self.initialize_game()  # Initialize next level
             self.state = GameState.Playing  # Start playing
         else:  # If final level completed
@@ -506,49 +732,46 @@ class Game:
     def save_game(self):
         """Save current game state"""
         self.player.score = self.snake.score  # Update score
-        if self.db.safe_game(self.player):  # If save successful
+        self.run_db(self.db.safe_game, self.player_snapshot(), on_done=self.finish_save, wait=True)
+
+    def finish_save(self, saved):
+        """Save call finished"""
+        if saved:  # If save successful
             self.state = GameState.Menu  # Return to menu
+        else:
+            self.state   = GameState.Paused
+            self.message = "Save failed"
 
     def update(self):
         """Update game state"""
         if self.state != GameState.Playing:  # Only update during gameplay
             return
 
-        # Move snake and check for game over
-        if not self.snake.move(self.current_level):
-            self.state = GameState.Lose
-            return
-
-        # Check if snake ate regular food
-        if self.snake.body[0].colliderect(self.food.rect):
-            self.snake.grow()  # Grow snake
-            self.food.generate_new_postion(self.snake)  # New food position
+        # Autopilot presses keys like a player would
+        if self.autopilot:
+            key = self.autopilot.choose_key(self.sim)
+            if key: self.handle_key_press(key)
 
-        # Check if level completed (score threshold)
-        if self.snake.score >= self.player.level * 5:
-            self.state = GameState.Win
+        # Apply one queued direction press per tick
+        direction = self.input_queue.popleft() if self.input_queue else None
+        self.state = self.sim.step(direction)
 
-        # Update special food
-        self.special_food.update(self.snake)
-
-        # Check if snake ate special food
-        if (self.special_food.active and self.snake.body[0].colliderect(self.special_food.rect)):
-            self.snake.grow()  # Grow snake
-            self.snake.score  += 1  # Bonus score
-            self.special_food.active = False  # Deactivate special food
-            self.special_food.timer  = 0  # Reset timer
+        if self.recorder:
+            self.recorder.record(direction, self.sim, self.state)
+            if self.state != GameState.Playing: self.finish_recording()  # Round over
     
-    def draw(self):
-        """Draw current game state"""
+    def draw(self, alpha=1.0):
+        """Draw current game state (alpha: progress between last and next tick)"""
         self.screen.fill(Colors.White)  # Clear screen
 
         # Draw appropriate screen based on game state
         if self.state == GameState.Login:   self.draw_login()
         if self.state == GameState.Menu:    self.draw_menu()
-        if self.state == GameState.Playing: self.draw_game()
+        if self.state == GameState.Playing: self.draw_game(alpha)
         if self.state == GameState.Win:     self.draw_win()
         if self.state == GameState.Lose:    self.draw_lose()
         if self.state == GameState.Paused:  self.draw_paused()
+        if self.state == GameState.Connecting: self.draw_connecting()
 
         # Draw score during gameplay and pause
         if self.state in [GameState.Playing, GameState.Paused]:
@@ -557,75 +780,170 @@ class Game:
         pg.display.flip()  # Update display
         
         # Special case for final level completion
-        if self.state == GameState.Win and self.player.level == 3: pass
+        if self.state == GameState.Win and self.player.level == LEVEL_COUNT: pass
+
+    def draw_text(self, font, pos, text, color=Colors.Black):
+        """Draw text through the shared cache"""
+        text_cache.draw(self.screen, pos, font, text, color)
 
     def draw_login(self):
         """Draw login screen"""
-        self.title_font.render_to(self.screen, (340, 270), "Enter Username", Colors.Black)
+        self.draw_text(self.title_font, (340, 270), "Enter Username")
         self.text_input.draw(self.screen)  # Draw text input box
         pg.draw.rect(self.screen, Colors.GreenB, Buttons.LOGIN)  # Draw login button
-        self.button_font.render_to(self.screen, (Buttons.LOGIN.x + 50, Buttons.LOGIN.y + 10), "Login", Colors.Black)
+        self.draw_text(self.button_font, (Buttons.LOGIN.x + 50, Buttons.LOGIN.y + 10), "Login")
+        if self.message: self.draw_text(self.info_font, (400, 580), self.message)  # Last error
+
+    def draw_connecting(self):
+        """Draw screen while waiting for database"""
+        waited = DB_TIMEOUT - (self.db_call[1] - time.perf_counter()) if self.db_call else 0
+        self.draw_text(self.title_font, (340, 270), "Connecting...")
+        self.draw_text(self.info_font, (340, 400), f"{waited:.0f} s, press Esc to cancel")
 
     def draw_paused(self):
         """Draw pause screen"""
-        self.title_font.render_to(self.screen, (80, 270), "PAUSED / press S to save", Colors.Black)
+        self.draw_text(self.title_font, (80, 270), "PAUSED / press S to save")
         pg.draw.rect(self.screen, Colors.GreenB, Buttons.SAVE_GAME)  # Save button
-        self.button_font.render_to(self.screen, (Buttons.SAVE_GAME.x + 20, Buttons.SAVE_GAME.y + 10), "Save & Play", Colors.Black)
+        self.draw_text(self.button_font, (Buttons.SAVE_GAME.x + 20, Buttons.SAVE_GAME.y + 10), "Save & Play")
+        if self.message: self.draw_text(self.info_font, (100, 500), self.message)  # Last error
 
     def draw_menu(self):
         """Draw main menu"""
         pg.draw.rect(self.screen, Colors.RedB, Buttons.FULL_SCREEN)  # Background
         pg.draw.rect(self.screen, Colors.GreenB, Buttons.START)  # Start button
-        self.button_font.render_to(self.screen, (Buttons.START.x + 20, Buttons.START.y + 10), "Start Game", Colors.Black)
+        self.draw_text(self.button_font, (Buttons.START.x + 20, Buttons.START.y + 10), "Start Game")
 
         # Welcome message with player info
         info_text = f"Welcom {self.player.name}! Level: {self.player.level}, Score: {self.player.score}"
-        self.info_font.render_to(self.screen, (100, 100), info_text, Colors.Black)
+        self.draw_text(self.info_font, (100, 100), info_text)
 
     def draw_win(self):
         """Draw level complete screen"""
-        self.title_font.render_to(self.screen, (340, 270), "Level Complete!", Colors.Black)
+        self.draw_text(self.title_font, (340, 270), "Level Complete!")
         pg.draw.rect(self.screen, Colors.GreenB, Buttons.PLAY_AGAIN)  # Continue button
         
         # Button text depends on whether it's final level
-        if self.player.level < 3: text = "Next Level"
+        if self.player.level < LEVEL_COUNT: text = "Next Level"
         else: text = "Play again"
         
-        self.button_font.render_to(self.screen, (Buttons.PLAY_AGAIN.x + 20, Buttons.PLAY_AGAIN.y + 10), text, Colors.Black)
+        self.draw_text(self.button_font, (Buttons.PLAY_AGAIN.x + 20, Buttons.PLAY_AGAIN.y + 10), text)
 
-    def draw_game(self):
+    def draw_game(self, alpha=1.0):
         """Draw gameplay screen"""
         self.current_level.draw(self.screen)  # Draw level
-        self.snake.draw(self.screen)  # Draw snake
+        self.snake.draw(self.screen, alpha)  # Draw snake
         self.food.draw(self.screen)  # Draw regular food
         self.special_food.draw(self.screen)  # Draw special food if active
     
     def draw_lose(self):
         """Draw game over screen"""
-        self.title_font.render_to(self.screen, (340, 270), "Game Over!", Colors.Black)
+        self.draw_text(self.title_font, (340, 270), "Game Over!")
         pg.draw.rect(self.screen, Colors.GreenB, Buttons.PLAY_AGAIN)  # Play again button
-        self.button_font.render_to(self.screen, (Buttons.PLAY_AGAIN.x + 20, Buttons.PLAY_AGAIN.y + 10), "Playe again", Colors.Black)
+        self.draw_text(self.button_font, (Buttons.PLAY_AGAIN.x + 20, Buttons.PLAY_AGAIN.y + 10), "Playe again")
 
     def draw_score(self):
         """Draw score and level info"""
-        self.score_font.render_to(self.screen, (20, 20), f"Score: {self.snake.score}", Colors.Black)
-        self.score_font.render_to(self.screen, (900, 20), f"Level: {self.player.level}", Colors.Black)
+        self.draw_text(self.score_font, (20, 20), f"Score: {self.snake.score}")
+        self.draw_text(self.score_font, (900, 20), f"Level: {self.player.level}")
         # Draw special food timer if active
         if self.special_food.active:
             remaining_time = (self.special_food.life_time - self.special_food.timer) // FPS
-            self.score_font.render_to(self.screen, (450, 20), f"Timer: {remaining_time}", Colors.Black)
+            self.draw_text(self.score_font, (450, 20), f"Timer: {remaining_time}")
 
     def run(self):
-        """Main game loop"""
-        running = True
+        """Main game loop: fixed FPS simulation ticks, rendering at render_fps"""
+        running  = True
+        lag      = 0.0  # Simulation time not yet run
+        previous = time.perf_counter()
+        profiler = self.profiler
         while running:
-            running = self.handle_events()  # Process events
-            self.update()  # Update game state
-            self.draw()  # Render screen
-            self.clock.tick(FPS)  # Maintain frame rate
+            now  = time.perf_counter()
+            lag += now - previous
+            previous = now
+            profiler.begin_frame()
+
+            with profiler.phase("events"):
+                running = self.handle_events()  # Process events
+                self.poll_db()  # Finish database calls that are done
+
+            # Run as many fixed ticks as real time requires
+            ticks = 0
+            with profiler.phase("update"):
+                while lag >= SIM_STEP and ticks < MAX_TICKS_PER_FRAME:
+                    self.update()  # Update game state
+                    lag   -= SIM_STEP
+                    ticks += 1
+            if ticks == MAX_TICKS_PER_FRAME: lag = 0.0  # Too far behind, don't try to catch up
+
+            with profiler.phase("draw"):
+                self.draw(lag / SIM_STEP)  # Render screen between ticks
+
+            profiler.end_frame()
+            self.clock.tick(self.render_fps)  # Limit render rate
+
+        self.finish_recording()  # Save unfinished round on exit
+        self.executor.shutdown(wait=True)  # Let background saves finish (bounded by connect_timeout)
+
+def measure_startup():
+    """Print cold start timings: module import, Game() and first frame"""
+    imported = time.perf_counter()
+    game = Game()
+    created = time.perf_counter()
+    game.handle_events()
+    game.draw()  # First frame (login screen)
+    first_frame = time.perf_counter()
+    print(f"import:      {(imported - IMPORT_START) * 1000:.1f} ms")
+    print(f"Game():      {(created - imported) * 1000:.1f} ms")
+    print(f"first frame: {(first_frame - created) * 1000:.1f} ms")
+    print(f"total:       {(first_frame - IMPORT_START) * 1000:.1f} ms")
+
+def check_recording(rounds=3):
+    """Record autopilot rounds through Game and verify every replay file plays back identically"""
+    import tempfile
+    from autopilot import Autopilot
+    from replay import Replay, play
+    with tempfile.TemporaryDirectory() as record_dir:
+        game = Game(record_dir=record_dir)
+        game.autopilot = Autopilot()
+        game.player = Player("check")
+        for _ in range(rounds):
+            game.start_game()
+            while game.state == GameState.Playing: game.update()
+        game.finish_recording()
+
+        for name in sorted(os.listdir(record_dir)):
+            replay = Replay.load(os.path.join(record_dir, name))
+            state, mismatch = play(replay)
+            ok = mismatch is None and state.name == replay.result.name
+            print(f"{name}: {len(replay.inputs)} ticks, {replay.result.name}, {'ok' if ok else 'MISMATCH'}")
+            if not ok: sys.exit(1)
+        game.executor.shutdown()
 
 # Entry point
 if __name__ == "__main__":
-    game = Game()  # Create game instance
-    game.run()  # Start game
+    if "--startup-time" in sys.argv: measure_startup()  # Measure and exit
+    elif "--check-recording" in sys.argv: check_recording()  # Record rounds, verify replays and exit
+    else:
+        render_fps = RENDER_FPS
+        if "--render-fps" in sys.argv: render_fps = int(sys.argv[sys.argv.index("--render-fps") + 1])
+        record_dir = None
+        if "--record" in sys.argv:
+            record_dir = sys.argv[sys.argv.index("--record") + 1]
+            os.makedirs(record_dir, exist_ok=True)
+        profiler = None
+        if "--profile" in sys.argv:  # Per-frame timing, report written on exit
+            profiler = FrameProfiler(1 / render_fps, trace_memory="--profile-memory" in sys.argv)
+        db = None
+        if "--local-store" in sys.argv:  # Offline-first: SQLite file, synced to PostgreSQL in background
+            from local_store import LocalStore
+            db = LocalStore()
+        game = Game(render_fps, record_dir, profiler, db)  # Create game instance
+        if "--autopilot" in sys.argv:
+            from autopilot import Autopilot
+            game.autopilot = Autopilot()
+        game.run()  # Start game
+        if profiler:
+            profiler.dump("frame_report.txt")
+            print(profiler.report().split("\n\n")[0])  # Summary table
+        if db: db.close()  # Last sync attempt
     pg.quit()  # Clean up pygame
\ No newline at end of file
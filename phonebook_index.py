@@ -0,0 +1,106 @@
+import csv
+import io
+from bisect import bisect_left, insort
+
+# In-process PhoneBook index for instant prefix / as-you-type lookups.
+# Loaded with one COPY per shard (see phonebook_shards.py), then kept current by polling each
+# shard for ids above the last one seen there; ids are per shard, so rows are keyed (shard, id).
+# Id polling only sees new rows: call reload() to pick up updates and deletes.
+
+
+def digits(number):
+    """Number without spaces, dashes, brackets or '+'"""
+    return ''.join(ch for ch in number if ch.isdigit())
+
+
+class PhoneBookIndex:
+    def __init__(self, router=None):
+        if router is None:
+            from phonebook_shards import ShardRouter  # Imports digits from here
+            router = ShardRouter()
+        self.router  = router
+        self.rows    = {}   # (shard, id) -> (name, number)
+        self.names   = []   # Sorted (lowercase name, key)
+        self.numbers = []   # Sorted (digits of number, key)
+        self.by_number = {} # Exact number -> set of keys (reverse index)
+        self.last_id = {}   # Shard -> highest id loaded
+
+    def add(self, shard, row_id, name, number, keep_sorted=True):
+        """Add one row to every index"""
+        key = (shard, row_id)
+        self.rows[key] = (name, number)
+        self.by_number.setdefault(number, set()).add(key)
+        if keep_sorted:
+            insort(self.names, (name.lower(), key))
+            insort(self.numbers, (digits(number), key))
+        else:
+            self.names.append((name.lower(), key))
+            self.numbers.append((digits(number), key))
+        self.last_id[shard] = max(self.last_id.get(shard, 0), row_id)
+
+    def copy_shard(self, shard):
+        """Whole PhoneBook of one shard as CSV, with one COPY"""
+        buffer = io.StringIO()
+        with self.router.replicas[shard].connect_read() as conn:
+            with conn.cursor() as cur:
+                cur.copy_expert("COPY (SELECT id, name, number FROM PhoneBook) TO STDOUT WITH (FORMAT csv)", buffer)
+        buffer.seek(0)
+        return buffer
+
+    def reload(self):
+        """Load every shard, shards copied in parallel"""
+        futures = {shard: self.router.executor.submit(self.copy_shard, shard) for shard in self.router.shards}
+        buffers = {shard: future.result() for shard, future in futures.items()}
+
+        self.rows, self.names, self.numbers, self.by_number = {}, [], [], {}
+        self.last_id = {shard: 0 for shard in self.router.shards}
+        for shard, buffer in buffers.items():
+            for row_id, name, number in csv.reader(buffer):
+                self.add(shard, int(row_id), name, number, keep_sorted=False)
+        self.names.sort()  # Sort once instead of per row
+        self.numbers.sort()
+        return len(self.rows)
+
+    def refresh(self):
+        """Fetch rows inserted on any shard since the last load/refresh, returns how many"""
+        futures = {shard: self.router.executor.submit(
+                       self.router.execute, shard, "SELECT id, name, number FROM PhoneBook WHERE id > %s ORDER BY id",
+                       (self.last_id.get(shard, 0),), True)
+                   for shard in self.router.shards}
+        new_rows = 0
+        for shard, future in futures.items():
+            for row_id, name, number in future.result():
+                self.add(shard, row_id, name, number)
+                new_rows += 1
+        return new_rows
+
+    @staticmethod
+    def _prefix_range(keys, prefix, limit):
+        """Row keys of sorted (text, key) entries whose text starts with prefix"""
+        ids = []
+        start = bisect_left(keys, (prefix,))
+        for text, key in keys[start:start + limit]:
+            if not text.startswith(prefix): break
+            ids.append(key)
+        return ids
+
+    def search(self, prefix, limit=20):
+        """Rows whose name or number starts with prefix: [(shard, id, name, number)]"""
+        prefix = prefix.strip()
+        if not prefix: return []
+
+        ids = self._prefix_range(self.names, prefix.lower(), limit)
+        number_prefix = digits(prefix)
+        if number_prefix and not any(ch.isalpha() for ch in prefix):  # Looks like a number
+            ids += self._prefix_range(self.numbers, number_prefix, limit)
+
+        seen, result = set(), []
+        for key in ids:
+            if key not in seen and key in self.rows:
+                seen.add(key)
+                result.append((*key, *self.rows[key]))
+        return sorted(result, key=lambda row: row[2].lower())[:limit]
+
+    def find_number(self, number):
+        """Rows with exactly this number"""
+        return [(*key, *self.rows[key]) for key in sorted(self.by_number.get(number, ()))]
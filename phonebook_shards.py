@@ -0,0 +1,182 @@
+import hashlib
+import sys
+from configparser import ConfigParser
+from concurrent.futures import ThreadPoolExecutor
+import psycopg2
+from psycopg2.extras import execute_values
+from config import load_config, load_replicas
+from phonebook_index import digits
+from replicas import ReplicaRouter
+
+# Hash-sharded PhoneBook over several PostgreSQL servers.
+# Every [shard...] section of database.ini is one shard (without any, [postgresql] is the only shard).
+# A row lives on the shard picked by rendezvous hashing of its normalized number: inserts, number
+# lookups and deletes by number go to one shard, everything else fans out to all shards in parallel.
+# Rendezvous hashing moves only ~1/n of the rows when a shard is added, see rebalance().
+# Shards are identified by section name, so renaming a section means rebalancing.
+# Reads of a shard go to its [<shard>_replica...] sections when it has any (see replicas.py).
+SHARD_PREFIX = 'shard'
+BATCH_SIZE   = 1000
+
+
+def load_shards(filename='database.ini', prefix=SHARD_PREFIX):
+    """Shard name -> connection config, from every section starting with prefix (replicas excluded)"""
+    parser = ConfigParser()
+    parser.read(filename)
+    names = [section for section in parser.sections() if section.startswith(prefix) and '_replica' not in section]
+    if not names: return {'postgresql': load_config(filename)}
+    return {name: load_config(filename, name) for name in names}
+
+
+class ShardRouter:
+    def __init__(self, shards=None, filename='database.ini'):
+        self.shards   = shards or load_shards(filename)  # Shard name -> config
+        self.replicas = {shard: ReplicaRouter(config, load_replicas(filename, shard))  # Read/write routing per shard
+                         for shard, config in self.shards.items()}
+        self.executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard")
+
+    @staticmethod
+    def weight(shard, key):
+        """Rendezvous weight of key on shard"""
+        return int.from_bytes(hashlib.blake2b(f"{shard}/{key}".encode(), digest_size=8).digest(), 'big')
+
+    def shard_for(self, number):
+        """Name of the shard that owns a number"""
+        key = digits(number)
+        return max(self.shards, key=lambda shard: self.weight(shard, key))
+
+    def execute(self, shard, query, params=None, fetch=False):
+        """Run one statement on one shard, returns rows (fetch, may use a replica) or row count (primary)"""
+        router = self.replicas[shard]
+        with (router.connect_read() if fetch else router.connect_write()) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                result = cur.fetchall() if fetch else cur.rowcount
+                conn.commit()
+        return result
+
+    def fan_out(self, query, params=None, fetch=False):
+        """Run statement on every shard in parallel: {shard: rows or row count}"""
+        futures = {shard: self.executor.submit(self.execute, shard, query, params, fetch) for shard in self.shards}
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def query_all(self, query, params=None):
+        """Merged rows of all shards as (shard, *row), sorted by shard and id"""
+        results = self.fan_out(query, params, fetch=True)
+        return sorted((shard, *row) for shard, rows in results.items() for row in rows)
+
+    def insert(self, name, number):
+        self.execute(self.shard_for(number), "INSERT INTO PhoneBook (name, number) VALUES (%s, %s)", (name, number))
+
+    def insert_many(self, rows):
+        """Insert (name, number) rows, one batched insert per shard, shards in parallel"""
+        by_shard = {}
+        for name, number in rows:
+            by_shard.setdefault(self.shard_for(number), []).append((name, number))
+        futures = [self.executor.submit(self.insert_batch, shard, batch) for shard, batch in by_shard.items()]
+        for future in futures: future.result()
+        return {shard: len(batch) for shard, batch in by_shard.items()}
+
+    def insert_batch(self, shard, rows):
+        with self.replicas[shard].connect_write() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, "INSERT INTO PhoneBook (name, number) VALUES %s", rows, page_size=BATCH_SIZE)
+                conn.commit()
+
+    def find_number(self, number):
+        """Exact number lookup, asks only the owning shard"""
+        shard = self.shard_for(number)
+        rows = self.execute(shard, "SELECT * FROM PhoneBook WHERE number = %s", (number,), fetch=True)
+        return [(shard, *row) for row in rows]
+
+    def find_name(self, name):
+        return self.query_all("SELECT * FROM PhoneBook WHERE name = %s", (name,))
+
+    def search(self, pattern):
+        """Partial match on name or number across all shards"""
+        return self.query_all("SELECT * FROM PhoneBook WHERE name ILIKE %s OR number ILIKE %s",
+                              (f"%{pattern}%", f"%{pattern}%"))
+
+    def show_all(self):
+        return self.query_all("SELECT * FROM PhoneBook")
+
+    def rename(self, name, new_name):
+        """Rename by name (not the shard key, so on every shard), returns rows changed"""
+        return sum(self.fan_out("UPDATE PhoneBook SET name = %s WHERE name = %s", (new_name, name)).values())
+
+    def change_number(self, name, new_number):
+        """Set number of rows with this name, moving them to the new number's shard, returns rows changed"""
+        target = self.shard_for(new_number)
+        changed = 0
+        for shard, *row in self.find_name(name):
+            if shard == target:
+                changed += self.execute(shard, "UPDATE PhoneBook SET number = %s WHERE id = %s", (new_number, row[0]))
+            else:  # Insert first: a failure in between leaves a duplicate, never a lost row
+                self.execute(target, "INSERT INTO PhoneBook (name, number) VALUES (%s, %s)", (row[1], new_number))
+                changed += self.execute(shard, "DELETE FROM PhoneBook WHERE id = %s", (row[0],))
+        return changed
+
+    def delete_number(self, number):
+        return self.execute(self.shard_for(number), "DELETE FROM PhoneBook WHERE number = %s", (number,))
+
+    def delete_name(self, name):
+        return sum(self.fan_out("DELETE FROM PhoneBook WHERE name = %s", (name,)).values())
+
+    def counts(self):
+        """Rows per shard"""
+        return {shard: rows[0][0] for shard, rows in self.fan_out("SELECT COUNT(*) FROM PhoneBook", fetch=True).items()}
+
+    def rebalance(self):
+        """Move rows that hash to another shard (after adding one), returns rows moved per source shard"""
+        futures = {shard: self.executor.submit(self.rebalance_shard, shard) for shard in self.shards}
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def rebalance_shard(self, shard):
+        """Move misplaced rows of one shard in batches: insert on owner first, then delete here"""
+        moved = 0
+        with psycopg2.connect(**self.shards[shard]) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, name, number FROM PhoneBook ORDER BY id")
+                misplaced = [row for row in cur.fetchall() if self.shard_for(row[2]) != shard]
+
+            for start in range(0, len(misplaced), BATCH_SIZE):
+                batch = misplaced[start:start + BATCH_SIZE]
+                by_target = {}
+                for row_id, name, number in batch:
+                    by_target.setdefault(self.shard_for(number), []).append((name, number))
+                for target, rows in by_target.items():
+                    self.insert_batch(target, rows)
+
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM PhoneBook WHERE id = ANY(%s)", ([row[0] for row in batch],))
+                conn.commit()
+                moved += len(batch)
+        return moved
+
+    def create_tables(self):
+        self.fan_out("""
+            CREATE TABLE IF NOT EXISTS phonebook(
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                number VARCHAR(15) NOT NULL
+            )
+            """)
+        self.fan_out("CREATE INDEX IF NOT EXISTS phonebook_number ON phonebook(number)")
+
+
+if __name__ == '__main__':
+    # Usage: python phonebook_shards.py [status|create|rebalance]
+    # To add a shard: add a [shardN] section, run create, then rebalance.
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    router = ShardRouter()
+    try:
+        if command == 'create':
+            router.create_tables()
+            print(f"PhoneBook ready on {len(router.shards)} shards.")
+        elif command == 'rebalance':
+            for shard, moved in router.rebalance().items():
+                print(f"{shard}: moved {moved} rows")
+        for shard, count in router.counts().items():
+            print(f"{shard}: {count} rows")
+    except Exception as error:
+        print("Error:", error)
@@ -0,0 +1,155 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from collections import deque
+
+# Frame profiler for Game.run: records how long each phase of every frame takes.
+# Game uses NullProfiler unless profiling is switched on (--profile), so it costs nothing by default.
+# With --profile every frame runs under cProfile (until max_captures spikes are kept) and the stats
+# are kept only for frames over budget, so a spike's profile is that frame's own.
+
+
+class _Phase:
+    """Context manager timing one named phase"""
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name     = name
+        self.started  = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, budget, window=900, max_captures=5, trace_memory=False):
+        self.budget       = budget        # Seconds a frame may take
+        self.window       = window        # Frames kept for rolling percentiles
+        self.max_captures = max_captures  # Spike captures kept per session
+        self.frames       = deque(maxlen=window)  # Frame durations
+        self.phases       = {}            # Phase name -> deque of durations
+        self.current      = {}            # Phase name -> time spent in current frame
+        self._phases      = {}            # Reused _Phase objects
+        self.frame_count  = 0             # Frames recorded this session
+        self.missed       = 0             # Frames over budget this session
+        self.worst        = 0.0           # Longest frame this session
+        self.captures     = []            # Spike captures (dicts)
+        self.frame_start  = 0.0
+        self.cprofile     = cProfile.Profile()  # Profiles every frame, cleared unless it was a spike
+        self.session_start = time.perf_counter()
+
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def phase(self, name):
+        """Time a block: with profiler.phase('draw'): ..."""
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def add(self, name, seconds):
+        """Add time to a phase of the current frame"""
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def begin_frame(self):
+        """Mark start of a frame"""
+        self.current = {}
+        if self.cprofile is not None: self.cprofile.enable()
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Mark end of a frame, record phases and check budget"""
+        duration = time.perf_counter() - self.frame_start
+        if self.cprofile is not None: self.cprofile.disable()
+        self.frames.append(duration)
+        self.frame_count += 1
+        self.worst = max(self.worst, duration)
+
+        for name, seconds in self.current.items():
+            if name not in self.phases: self.phases[name] = deque(maxlen=self.window)
+            self.phases[name].append(seconds)
+
+        if duration > self.budget:
+            self.missed += 1
+            self.capture(duration)
+
+        if self.cprofile is not None:
+            self.cprofile.clear()  # Keep only this frame's calls in the next capture
+            if len(self.captures) >= self.max_captures: self.cprofile = None  # Enough spikes, stop paying for it
+
+    def capture(self, duration):
+        """Record a frame spike: phase breakdown, memory snapshot and cProfile of the same frame"""
+        if len(self.captures) >= self.max_captures: return
+
+        spike = {'frame': self.frame_count, 'ms': duration * 1000,
+                 'phases': {name: seconds * 1000 for name, seconds in self.current.items()}}
+        if self.trace_memory and tracemalloc.is_tracing():
+            top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            spike['memory'] = [str(stat) for stat in top]
+        if self.cprofile is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.cprofile, stream=stream).sort_stats('cumulative').print_stats(15)
+            spike['profile'] = stream.getvalue()
+        self.captures.append(spike)
+
+    @staticmethod
+    def percentile(values, p):
+        """Nearest-rank percentile of a sequence"""
+        if not values: return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def stats(self):
+        """Rolling p50/p95/p99/max in ms for the frame and every phase"""
+        rows = {'frame': self.frames, **self.phases}
+        return {name: {'p50': self.percentile(values, 50) * 1000,
+                       'p95': self.percentile(values, 95) * 1000,
+                       'p99': self.percentile(values, 99) * 1000,
+                       'max': max(values, default=0.0) * 1000}
+                for name, values in rows.items()}
+
+    def report(self):
+        """Session report as text"""
+        elapsed = time.perf_counter() - self.session_start
+        lines = [f"Frames: {self.frame_count} in {elapsed:.1f} s, budget {self.budget * 1000:.1f} ms, "
+                 f"missed {self.missed}, worst {self.worst * 1000:.1f} ms",
+                 f"(cProfile on every frame until {self.max_captures} spikes were captured, timings include its overhead)",
+                 f"Last {len(self.frames)} frames (ms):",
+                 f"{'phase':<10}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for name, row in self.stats().items():
+            lines.append(f"{name:<10}{row['p50']:8.2f}{row['p95']:8.2f}{row['p99']:8.2f}{row['max']:8.2f}")
+
+        for spike in self.captures:
+            phases = ', '.join(f"{name} {ms:.1f}" for name, ms in spike['phases'].items())
+            lines.append(f"\nSpike at frame {spike['frame']}: {spike['ms']:.1f} ms ({phases})")
+            for stat in spike.get('memory', []): lines.append('  ' + stat)
+            if 'profile' in spike: lines.append(spike['profile'])
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """Write session report to file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.report() + '\n')
+        if self.trace_memory: tracemalloc.stop()
+
+
+class NullProfiler:
+    """Does nothing, used when profiling is off"""
+    class _NullPhase:
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+
+    _phase = _NullPhase()
+
+    def phase(self, name): return self._phase
+    def begin_frame(self): pass
+    def end_frame(self): pass
+    def dump(self, path): pass
@@ -0,0 +1,142 @@
+import struct
+import sys
+import time
+import zlib
+from array import array
+import pygame as pg
+from main_snake import Simulation, GameState, Colors, FPS, SCREEN_WIDTH, SCREEN_HEIGHT, init_pygame
+
+# Replay file layout (little-endian):
+#   header  - magic, version, seed, level, starting score, tick count, result
+#   inputs  - zlib compressed, one direction code per tick
+#   hashes  - one uint32 state hash per tick (after the tick)
+MAGIC   = b'SNKR'
+VERSION = 2  # 2: food spawns from compiled level spawn cells
+HEADER  = struct.Struct('<4sBIBHIB')
+LENGTH  = struct.Struct('<I')
+
+# Direction code per tick: 0 = no input
+DIRECTIONS = [None, (1, 0), (-1, 0), (0, 1), (0, -1)]
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+# Round result stored in header, by name: a game started as `python main_snake.py` passes
+# __main__.GameState members, which are not the GameState imported here
+RESULTS = [GameState.Playing.name, GameState.Win.name, GameState.Lose.name]
+
+
+class Replay:
+    def __init__(self, seed, level_num, score, inputs=None, hashes=None, result=GameState.Playing):
+        self.seed      = seed                        # Simulation seed
+        self.level_num = level_num                   # Level played
+        self.score     = score                       # Score at round start
+        self.inputs    = inputs or bytearray()       # Direction code per tick
+        self.hashes    = hashes or array('I')        # State hash after each tick
+        self.result    = result                      # State the round ended in
+
+    def save(self, path):
+        """Write replay to a binary file"""
+        hashes = array('I', self.hashes)
+        if sys.byteorder == 'big': hashes.byteswap()
+        inputs = zlib.compress(bytes(self.inputs), 9)  # Mostly "no input", compresses well
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.level_num, self.score,
+                                len(self.inputs), RESULTS.index(self.result.name)))
+            f.write(LENGTH.pack(len(inputs)))
+            f.write(inputs)
+            f.write(hashes.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read replay from a binary file"""
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        magic, version, seed, level_num, score, ticks, result = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise Exception('{0} is not a version {1} replay file'.format(path, VERSION))
+
+        offset = HEADER.size
+        (size,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        inputs = bytearray(zlib.decompress(data[offset:offset + size]))
+        offset += size
+
+        hashes = array('I')
+        hashes.frombytes(data[offset:offset + ticks * hashes.itemsize])
+        if sys.byteorder == 'big': hashes.byteswap()
+
+        return cls(seed, level_num, score, inputs, hashes, GameState[RESULTS[result]])
+
+
+class ReplayRecorder:
+    """Records a Simulation round tick by tick"""
+    def __init__(self, sim):
+        self.replay = Replay(sim.seed, sim.level_num, sim.snake.score)
+
+    def record(self, direction, sim, state):
+        """Store input applied this tick and resulting state hash"""
+        self.replay.inputs.append(DIRECTION_CODES[direction])
+        self.replay.hashes.append(sim.state_hash())
+        self.replay.result = state
+
+    def save(self, path):
+        """Save recorded round, returns False if nothing was played"""
+        if not self.replay.inputs: return False
+        self.replay.save(path)
+        return True
+
+
+def draw_sim(screen, sim):
+    """Draw one simulation frame"""
+    screen.fill(Colors.White)
+    sim.level.draw(screen)
+    sim.snake.draw(screen)
+    sim.food.draw(screen)
+    sim.special_food.draw(screen)
+    pg.display.flip()
+
+
+def play(replay, render=False, fast=False):
+    """Play replay back, returns (final state, first mismatching tick or None)"""
+    sim = Simulation(replay.level_num, replay.score, replay.seed)
+    state = GameState.Playing
+
+    if render:
+        init_pygame()
+        screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pg.display.set_caption("Snake Replay")
+        clock = pg.time.Clock()
+
+    for tick, code in enumerate(replay.inputs):
+        state = sim.step(DIRECTIONS[code])
+        if sim.state_hash() != replay.hashes[tick]:
+            return state, tick  # Simulation diverged from recording
+
+        if render:
+            if pg.event.peek(pg.QUIT): break
+            pg.event.pump()
+            draw_sim(screen, sim)
+            if not fast: clock.tick(FPS)
+
+    return state, None
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python replay.py FILE [--render] [--fast]")
+        sys.exit(2)
+
+    replay = Replay.load(sys.argv[1])
+    started = time.perf_counter()
+    state, mismatch = play(replay, render="--render" in sys.argv, fast="--fast" in sys.argv)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(replay.inputs)} ticks in {elapsed * 1000:.1f} ms, level {replay.level_num}, result {state.name}")
+    if mismatch is not None:
+        print(f"State mismatch at tick {mismatch}")
+        sys.exit(1)
+    if state.name != replay.result.name:
+        print(f"Result mismatch: recorded {replay.result.name}")
+        sys.exit(1)
+    print("Replay verified")
@@ -0,0 +1,103 @@
+import itertools
+import threading
+import time
+import psycopg2
+from config import load_config, load_replicas
+
+# Read/write splitting: writes go to the primary, reads round-robin over its replicas.
+# Replicas are the [<section>_replica...] sections of database.ini (see config.load_replicas).
+# A replica lagging more than max_lag is skipped until its next check; one that doesn't answer is
+# checked again after a growing delay (up to MAX_BACKOFF), so reads don't keep waiting on its
+# connect timeout. With no usable replica reads fall back to the primary. After a write, reads
+# with the same key (e.g. the player's name) stay on the primary for `sticky` seconds so nobody
+# reads back a stale copy.
+MAX_LAG        = 5.0   # Seconds a replica may be behind
+STICKY_SECONDS = 10.0  # Reads stay on the primary this long after a write
+CHECK_INTERVAL = 2.0   # Seconds between lag checks of one replica
+MAX_BACKOFF    = 60.0  # Longest wait before checking an unreachable replica again
+
+# Replay lag; 0 when everything received is replayed (an idle primary doesn't count as lag)
+LAG_QUERY = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+    """
+
+
+class ReplicaRouter:
+    def __init__(self, primary=None, replicas=None, filename='database.ini', section='postgresql',
+                 max_lag=MAX_LAG, sticky=STICKY_SECONDS):
+        self.primary  = primary or load_config(filename, section)
+        self.replicas = load_replicas(filename, section) if replicas is None else replicas
+        for config in self.replicas: config.setdefault("connect_timeout", "2")  # Fall back quickly
+        self.max_lag  = max_lag
+        self.sticky   = sticky
+        self.turn     = itertools.count()  # Round-robin position
+        self.lock     = threading.Lock()
+        self.checked  = {}  # Replica index -> (time of next check, usable, failures in a row)
+        self.written  = {}  # Key -> time of last write through this router
+
+    def wrote(self, key=None):
+        """Remember a write so reads with this key go to the primary for a while"""
+        with self.lock:
+            self.written[key] = time.monotonic()
+
+    def is_sticky(self, key):
+        with self.lock:
+            written = self.written.get(key)
+            if written is None: return False
+            if time.monotonic() - written < self.sticky: return True
+            del self.written[key]
+            return False
+
+    def usable(self, index):
+        """Replica answers and isn't lagging, from the last check until the next one is due"""
+        with self.lock:
+            checked = self.checked.get(index)
+        if checked and time.monotonic() < checked[0]: return checked[1]
+
+        try:
+            with psycopg2.connect(**self.replicas[index]) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(LAG_QUERY)
+                    usable = float(cur.fetchone()[0]) <= self.max_lag
+            conn.close()
+        except Exception as error:
+            print("Replica not available:", error)
+            self.mark_down(index)
+            return False
+
+        with self.lock:
+            self.checked[index] = (time.monotonic() + CHECK_INTERVAL, usable, 0)
+        return usable
+
+    def mark_down(self, index):
+        """Unreachable: wait twice as long as last time before checking again, up to MAX_BACKOFF"""
+        with self.lock:
+            failures = self.checked.get(index, (0, False, 0))[2] + 1
+            wait = min(CHECK_INTERVAL * 2 ** failures, MAX_BACKOFF)
+            self.checked[index] = (time.monotonic() + wait, False, failures)
+
+    def read_replica(self, key=None):
+        """Index of the replica for the next read, None for the primary"""
+        if not self.replicas or self.is_sticky(key): return None
+        start = next(self.turn)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            if self.usable(index): return index
+        return None
+
+    def connect_read(self, key=None):
+        """Connection for read-only queries: a replica when possible, otherwise the primary"""
+        index = self.read_replica(key)
+        if index is not None:
+            try:
+                return psycopg2.connect(**self.replicas[index])
+            except psycopg2.OperationalError as error:
+                print("Replica not available, reading from primary:", error)
+                self.mark_down(index)
+        return psycopg2.connect(**self.primary)
+
+    def connect_write(self, key=None):
+        """Connection to the primary; reads with key stick to the primary afterwards"""
+        self.wrote(key)
+        return psycopg2.connect(**self.primary)
@@ -0,0 +1,121 @@
+import json
+import select
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+from config import load_config
+
+# Live best-score table fed by PostgreSQL LISTEN/NOTIFY.
+# The users_score_notify trigger (create_sn_table.py) sends every inserted score on channel
+# 'users_score'. One ScoreListener holds one connection, keeps the best score per user in memory
+# and calls subscribers in-process, so any number of watchers cost a single DB connection.
+CHANNEL = 'users_score'
+
+
+class ScoreListener:
+    def __init__(self, config=None, reconnect_delay=2.0):
+        self.config          = config or load_config()
+        self.reconnect_delay = reconnect_delay
+        self.lock            = threading.Lock()
+        self.best            = {}   # user name -> (score, level)
+        self.subscribers     = []   # callback(user_name, score, level, new_best)
+        self.ready           = threading.Event()  # Initial table loaded
+        self.stopping        = False
+        self.thread          = threading.Thread(target=self.run, name="score-listener", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stopping = True
+        self.thread.join(timeout)
+
+    def subscribe(self, callback):
+        """Call callback(user_name, score, level, new_best) for every new score, returns unsubscribe function"""
+        with self.lock:
+            self.subscribers.append(callback)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers: self.subscribers.remove(callback)
+
+    def leaderboard(self, limit=10):
+        """Top users by best score: [(user_name, score, level)]"""
+        with self.lock:
+            rows = sorted(self.best.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [(name, score, level) for name, (score, level) in rows]
+
+    def load_best(self, cur):
+        """Full best-per-user table, used at start and after reconnecting"""
+        cur.execute("""
+                SELECT DISTINCT ON (users.user_name) users.user_name, users_score.score, users_score.level
+                FROM users
+                JOIN users_score ON users.user_id = users_score.user_id
+                ORDER BY users.user_name, users_score.score DESC
+                """)
+        with self.lock:
+            self.best = {name: (score, level) for name, score, level in cur.fetchall()}
+        self.ready.set()
+
+    def handle(self, payload):
+        """Apply one notification and tell subscribers"""
+        try:
+            row = json.loads(payload)
+        except ValueError:
+            print("Bad score notification:", payload)
+            return
+
+        name, score, level = row['user_name'], row['score'], row['level']
+        with self.lock:
+            new_best = score > self.best.get(name, (-1, 0))[0]
+            if new_best: self.best[name] = (score, level)
+            subscribers = list(self.subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(name, score, level, new_best)
+            except Exception as error:
+                print("Error in score subscriber:", error)
+
+    def run(self):
+        """Listener thread: wait on the socket, no polling queries"""
+        while not self.stopping:
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.config)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")  # Listen first so no insert is missed while loading
+                    self.load_best(cur)
+
+                while not self.stopping:
+                    if select.select([conn], [], [], 1.0) == ([], [], []): continue  # Timeout, check stopping
+                    conn.poll()
+                    while conn.notifies:
+                        self.handle(conn.notifies.pop(0).payload)
+
+            except Exception as error:
+                print("Error listening for scores:", error)
+                time.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None: conn.close()
+
+
+if __name__ == '__main__':
+    def show(name, score, level, new_best):
+        print(f"{name}: {score} (level {level})" + ("  NEW BEST" if new_best else ""))
+
+    listener = ScoreListener().start()
+    listener.subscribe(show)
+    if listener.ready.wait(10):
+        print('\nLeaderboard:')
+        for place, (name, score, level) in enumerate(listener.leaderboard(), 1):
+            print(f"{place}. {name} - {score} (level {level})")
+        print('\nWaiting for new scores (Ctrl+C to stop)\n')
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        listener.stop()
@@ -1,12 +1,12 @@
 import psycopg2
 from config import load_config
+from replicas import ReplicaRouter
 from tabulate import tabulate
 
 def show_data():
-    """ Show Table """
-    config = load_config()
+    """ Show Table (from a read replica when there is one) """
     try:
-        with psycopg2.connect(**config) as conn:
+        with ReplicaRouter().connect_read() as conn:
             with conn.cursor() as cur:
 
                 cur.execute("SELECT * FROM users_score")
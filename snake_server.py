@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from config import load_config
+from main_snake import Simulation, GameState, FPS, SIM_STEP, LEVEL_COUNT, MAX_NAME_LENGTH
+
+# Headless multi-session snake server.
+# Every session is a Simulation; one scheduler task steps all of them each tick and
+# sends each client a one-line delta, so thousands of sessions share a single loop.
+#
+# Client -> server (one command per line):
+#   JOIN <name> [level]   start a session, answered with "j <id>" and a snapshot line
+#   WATCH <id>            spectate a session (snapshot, then its deltas)
+#   U / D / L / R         direction for the next tick of your session
+#   QUIT                  leave
+#
+# Server -> client:
+#   j <id>                                      session id after JOIN
+#   snapshot <json>                             full state
+#   t <tick> <head x> <head y> <length> <score> per tick: insert head, drop tail, pad body to length
+#   f <x> <y>                                   food moved
+#   s <x> <y> / s -                             special food appeared / disappeared
+#   e <Win|Lose>                                session over
+#   error <message>
+DIRECTIONS = {"U": (0, -1), "D": (0, 1), "L": (-1, 0), "R": (1, 0)}
+MAX_BUFFER = 256 * 1024  # Drop clients that stop reading
+SAVE_INTERVAL = 1.0      # Seconds between batched result saves
+MAX_PENDING = 100000     # Unsaved results kept while the database is down, oldest dropped first
+
+
+class Session:
+    def __init__(self, session_id, name, level_num, writer):
+        self.id          = session_id
+        self.name        = name
+        self.sim         = Simulation(level_num)
+        self.inputs      = deque(maxlen=4)  # Directions waiting for next ticks
+        self.writers     = [writer]         # Player first, then spectators
+        self.food        = self.sim.food.rect.topleft
+        self.special     = None             # Position while special food is active
+
+    def snapshot(self):
+        """Full state as one line"""
+        sim = self.sim
+        state = {"id": self.id, "level": sim.level_num, "tick": sim.ticks, "score": sim.snake.score,
+                 "body": [segment.topleft for segment in sim.snake.body],
+                 "food": self.food, "special": self.special}
+        return "snapshot " + json.dumps(state, separators=(",", ":")) + "\n"
+
+    def step(self):
+        """Advance one tick, returns (delta line, resulting state)"""
+        sim = self.sim
+        state = sim.step(self.inputs.popleft() if self.inputs else None)
+        head = sim.snake.body[0]
+        lines = [f"t {sim.ticks} {head.x} {head.y} {len(sim.snake.body)} {sim.snake.score}\n"]
+
+        food = sim.food.rect.topleft
+        if food != self.food:
+            self.food = food
+            lines.append(f"f {food[0]} {food[1]}\n")
+
+        special = sim.special_food.rect.topleft if sim.special_food.active else None
+        if special != self.special:
+            self.special = special
+            lines.append(f"s {special[0]} {special[1]}\n" if special else "s -\n")
+
+        if state != GameState.Playing: lines.append(f"e {state.name}\n")
+        return "".join(lines), state
+
+
+class ResultStore:
+    """Saves finished sessions to users/users_score in batches through a connection pool"""
+    def __init__(self, config, max_connections=4):
+        self.pool     = ThreadedConnectionPool(1, max_connections, **config)
+        self.executor = ThreadPoolExecutor(max_connections)  # Keeps DB calls off the event loop
+        self.pending  = deque(maxlen=MAX_PENDING)  # (name, score, level) waiting for next batch
+
+    def add(self, name, score, level):
+        self.pending.append((name, score, level))
+
+    def save_batch(self, results):
+        """Insert a batch of results in one transaction"""
+        conn = self.pool.getconn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.executemany("INSERT INTO users (user_name) VALUES (%s) ON CONFLICT (user_name) DO NOTHING",
+                                    [(name,) for name in {name for name, score, level in results}])
+                    cur.executemany("""
+                            INSERT INTO users_score (user_id, score, level)
+                            SELECT user_id, %s, %s FROM users WHERE user_name = %s
+                            """, [(score, level, name) for name, score, level in results])
+        finally:
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    def save_rows(self, results):
+        """Save results one by one after a failed batch, dropping rows whose data the database rejects.
+        Returns results to try again later (connection, schema or permission problems)"""
+        for index, result in enumerate(results):
+            try:
+                self.save_batch([result])
+            except (psycopg2.DataError, psycopg2.IntegrityError, ValueError) as error:
+                # ValueError: psycopg2 refuses NUL in strings before sending
+                print("Dropping result the database rejects:", result, error)
+            except Exception as error:
+                print("Error saving results:", error)
+                return results[index:]  # Not this row's fault, keep the rest for later
+        return []
+
+    def requeue(self, results):
+        """Put unsaved results back in front of newer ones"""
+        dropped = len(results) + len(self.pending) - MAX_PENDING
+        if dropped > 0: print(f"Too many unsaved results, dropping {dropped} oldest")
+        self.pending = deque(results + list(self.pending), maxlen=MAX_PENDING)
+
+    async def flush(self):
+        """Save everything pending in a worker thread"""
+        if not self.pending: return
+        results = list(self.pending)
+        self.pending.clear()
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.save_batch, results)
+        except psycopg2.OperationalError as error:
+            print("Error saving results:", error)
+            self.requeue(results)  # Database unreachable, try again next batch
+        except Exception as error:
+            print("Error saving results, retrying one by one:", error)
+            self.requeue(await loop.run_in_executor(self.executor, self.save_rows, results))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(SAVE_INTERVAL)
+            await self.flush()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.closeall()
+
+
+class SnakeServer:
+    def __init__(self, store=None):
+        self.sessions  = {}                 # Session id -> Session
+        self.ids       = itertools.count(1)
+        self.store     = store              # ResultStore or None (no persistence)
+        self.tick_time = 0.0                # Seconds spent in last tick
+
+    def send(self, session, data):
+        """Write to player and spectators, dropping clients that can't keep up"""
+        data = data.encode()
+        for writer in list(session.writers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                session.writers.remove(writer)
+                writer.close()
+            else:
+                writer.write(data)
+
+    def finish(self, session, state):
+        """Remove session and queue its result"""
+        self.sessions.pop(session.id, None)
+        if self.store and state in (GameState.Win, GameState.Lose):
+            self.store.add(session.name, session.sim.snake.score, session.sim.level_num)
+
+    def tick(self):
+        """Step every session once"""
+        started = time.perf_counter()
+        for session in list(self.sessions.values()):
+            delta, state = session.step()
+            self.send(session, delta)
+            if state != GameState.Playing or not session.writers: self.finish(session, state)
+        self.tick_time = time.perf_counter() - started
+
+    async def run_ticks(self):
+        """Shared fixed-rate tick scheduler for all sessions"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            self.tick()
+            next_tick += SIM_STEP
+            delay = next_tick - loop.time()
+            if delay < 0: next_tick = loop.time()  # Overloaded: skip missed ticks
+            await asyncio.sleep(max(delay, 0))
+
+    async def report(self, interval=10):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"{len(self.sessions)} sessions, last tick {self.tick_time * 1000:.2f} ms "
+                  f"(budget {SIM_STEP * 1000:.1f} ms)")
+
+    async def handle_client(self, reader, writer):
+        """Read commands of one connection"""
+        session = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                command, *args = line.decode(errors="replace").split() or [""]
+                command = command.upper()
+
+                if command in DIRECTIONS:
+                    if session: session.inputs.append(DIRECTIONS[command])
+
+                elif command == "JOIN" and args and (len(args[0]) > MAX_NAME_LENGTH or "\0" in args[0]):
+                    writer.write(f"error name must be at most {MAX_NAME_LENGTH} characters without NUL\n".encode())
+
+                elif command == "JOIN" and args:
+                    level_num = int(args[1]) if len(args) > 1 and args[1].isdigit() else 1
+                    if session: self.finish(session, GameState.Playing)  # Leave previous session
+                    session = Session(next(self.ids), args[0], min(max(level_num, 1), LEVEL_COUNT), writer)
+                    self.sessions[session.id] = session
+                    writer.write(f"j {session.id}\n{session.snapshot()}".encode())
+
+                elif command == "WATCH" and args and args[0].isdigit() and int(args[0]) in self.sessions:
+                    watched = self.sessions[int(args[0])]
+                    watched.writers.append(writer)
+                    writer.write(watched.snapshot().encode())
+
+                elif command == "QUIT":
+                    break
+
+                else:
+                    writer.write(b"error unknown command\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if session and writer in session.writers: session.writers.remove(writer)
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, persist=True):
+    store = None
+    if persist:
+        try:
+            store = ResultStore(load_config())
+        except Exception as error:
+            print("Error connecting to database, results won't be saved:", error)
+    server = SnakeServer(store)
+
+    if unix_path: listener = await asyncio.start_unix_server(server.handle_client, unix_path)
+    else: listener = await asyncio.start_server(server.handle_client, host, port)
+    print("Snake server on", unix_path or f"{host}:{port}", f"({FPS} ticks/s)")
+
+    tasks = [asyncio.create_task(server.run_ticks()), asyncio.create_task(server.report())]
+    if store: tasks.append(asyncio.create_task(store.run()))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        for task in tasks: task.cancel()
+        if store:
+            await store.flush()
+            store.close()
+
+
+if __name__ == "__main__":
+    # Usage: python snake_server.py [port] [--unix PATH] [--no-db]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 8765
+    unix_path = sys.argv[sys.argv.index("--unix") + 1] if "--unix" in sys.argv else None
+    try:
+        asyncio.run(serve(port=port, unix_path=unix_path, persist="--no-db" not in sys.argv))
+    except KeyboardInterrupt:
+        print("\nServer stopped.\n")